@@ -0,0 +1,35 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+from typing import Tuple
+
+# Bounds and starting point for the number of concurrent interviews
+ADMISSION_INITIAL_LIMIT = int(os.getenv('ADMISSION_INITIAL_LIMIT', 5))
+ADMISSION_MIN_LIMIT = int(os.getenv('ADMISSION_MIN_LIMIT', 2))
+ADMISSION_MAX_LIMIT = int(os.getenv('ADMISSION_MAX_LIMIT', 50))
+# Outcomes are aggregated per window and the limit is reconsidered once per window
+ADMISSION_WINDOW_SECONDS = int(os.getenv('ADMISSION_WINDOW_SECONDS', 30))
+# A turn is slow when the candidate waits longer than this for the interviewer's first audio
+ADMISSION_TARGET_LATENCY = float(os.getenv('ADMISSION_TARGET_LATENCY', 3.0))
+MAX_SLOW_RATE = float(os.getenv('ADMISSION_MAX_SLOW_RATE', 0.1))
+MAX_ERROR_RATE = float(os.getenv('ADMISSION_MAX_ERROR_RATE', 0.05))
+# Fewer turns than this in a window say too little about health to change the limit
+MIN_WINDOW_TURNS = 5
+DECREASE_FACTOR = 0.75
+
+def next_limit(limit: int, turns: int, errors: int, slow: int, saturated: bool) -> Tuple[int, str]:
+    """
+    Additive-increase, multiplicative-decrease step for the admission limit.
+    Degrading windows cut the limit by a quarter. A healthy window in which
+    every slot was taken and candidates were waiting raises it by one.
+    Otherwise the limit holds, so it never grows past what was actually tested.
+    """
+    if turns >= MIN_WINDOW_TURNS:
+        if errors / turns > MAX_ERROR_RATE:
+            return max(ADMISSION_MIN_LIMIT, int(limit * DECREASE_FACTOR)), "errors"
+        if slow / turns > MAX_SLOW_RATE:
+            return max(ADMISSION_MIN_LIMIT, int(limit * DECREASE_FACTOR)), "latency"
+        if saturated and limit < ADMISSION_MAX_LIMIT:
+            return limit + 1, "headroom"
+    return limit, "hold"
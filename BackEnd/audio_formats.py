@@ -0,0 +1,58 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import io
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Formats the TTS provider can return natively, with how a browser and ffmpeg know them
+AUDIO_FORMATS: Dict[str, Dict[str, str]] = {
+    "opus": {"mime": "audio/ogg; codecs=opus", "container": "ogg", "codec": "libopus"},
+    "aac": {"mime": "audio/aac", "container": "adts", "codec": "aac"},
+    "mp3": {"mime": "audio/mpeg", "container": "mp3", "codec": "libmp3lame"},
+}
+# Server-side preference when the client accepts several; Safari without Opus support gets AAC
+TTS_AUDIO_FORMATS = [f for f in os.getenv('TTS_AUDIO_FORMATS', 'opus,aac,mp3').split(",") if f in AUDIO_FORMATS]
+# Speech-tuned bitrates in kbps for re-encoding; 0 keeps whatever the provider returns
+SPEECH_BITRATES = {
+    "opus": int(os.getenv('TTS_OPUS_BITRATE', 24)),
+    "aac": int(os.getenv('TTS_AAC_BITRATE', 48)),
+    "mp3": int(os.getenv('TTS_MP3_BITRATE', 0)),
+}
+MIN_BITRATE, MAX_BITRATE = 12, 128
+# The provider already returns the negotiated codec, so its audio is sent as-is by default.
+# TTS_TRANSCODE=on re-encodes every sentence at SPEECH_BITRATES in the process pool, trading
+# time to first audio for smaller payloads on slow links.
+TTS_TRANSCODE = os.getenv('TTS_TRANSCODE', 'off')
+
+def negotiate(accepted: Optional[str], bitrate: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Pick the audio format and bitrate for a session from the client's comma-separated
+    formats, in its order of preference. Clients that send nothing get MP3, which every browser plays.
+    The bitrate is 0, meaning the provider's own encoding, unless transcoding is on.
+    """
+    offered: List[str] = [f.strip().lower() for f in (accepted or "").split(",") if f.strip()]
+    candidates = [f for f in offered if f in TTS_AUDIO_FORMATS] if offered else []
+    audio_format = candidates[0] if candidates else "mp3"
+    if TTS_TRANSCODE != "on":
+        bitrate = 0
+    elif bitrate:
+        bitrate = max(MIN_BITRATE, min(MAX_BITRATE, bitrate))
+    else:
+        bitrate = SPEECH_BITRATES[audio_format]
+    return audio_format, bitrate
+
+def mime_type(audio_format: str) -> str:
+    return AUDIO_FORMATS[audio_format]["mime"]
+
+def transcode(audio: bytes, audio_format: str, bitrate: int) -> bytes:
+    """Re-encode provider audio at a speech bitrate; runs in the process pool"""
+    # pydub and ffmpeg are only needed when transcoding, so keep them off the import path
+    from pydub import AudioSegment
+    spec = AUDIO_FORMATS[audio_format]
+    parameters = ["-application", "voip"] if audio_format == "opus" else []
+    # Speech needs no more than mono at 24 kHz
+    segment = AudioSegment.from_file(io.BytesIO(audio)).set_channels(1).set_frame_rate(24000)
+    out = io.BytesIO()
+    segment.export(out, format=spec["container"], codec=spec["codec"], bitrate=f"{bitrate}k", parameters=parameters)
+    return out.getvalue()
@@ -0,0 +1,204 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import hashlib
+import hmac
+import logging
+import mmap
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from audio_formats import AUDIO_FORMATS
+from metrics import AUDIO_SPOOL_RECLAIMED_SEGMENTS, AUDIO_SPOOL_WRITTEN_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Set AUDIO_SPOOL=off to send sentence audio inline over the WebSocket instead
+AUDIO_SPOOL = os.getenv('AUDIO_SPOOL', 'on')
+AUDIO_SPOOL_DIR = os.getenv('AUDIO_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'interview-audio'))
+AUDIO_SPOOL_SEGMENT_BYTES = int(os.getenv('AUDIO_SPOOL_SEGMENT_BYTES', 64 * 1024 * 1024))
+# A segment takes writes for at most this long, then lives AUDIO_SPOOL_TTL more before it is deleted
+AUDIO_SPOOL_SEGMENT_SECONDS = int(os.getenv('AUDIO_SPOOL_SEGMENT_SECONDS', 60))
+# Long enough for a reconnecting client to replay unacknowledged sentences
+AUDIO_SPOOL_TTL = int(os.getenv('AUDIO_SPOOL_TTL', 900))
+RECLAIM_INTERVAL = 30
+# Segments live on this host's disk unless AUDIO_SPOOL_DIR is shared storage. With several hosts,
+# give each one the public base URL of its own /audio endpoint (e.g. https://api-2.example.com) so
+# clients fetch audio from the host that holds it; empty keeps audio URLs relative to the backend.
+AUDIO_SPOOL_URL = os.getenv('AUDIO_SPOOL_URL', '').rstrip('/')
+# Short tag for this host, carried in segment names so a misrouted request can be told from an expired one
+HOST_ID = hashlib.sha256(os.getenv('AUDIO_SPOOL_HOST', socket.gethostname()).encode()).hexdigest()[:8]
+
+# Segment names start with their creation time so any worker can tell when one has expired,
+# followed by the tag of the host that wrote them (absent from segments written before hosts were tagged)
+SEGMENT_NAME = re.compile(r"^(\d+)-(?:([0-9a-f]{8})-)?[0-9a-f]{12}$")
+# The audio format travels in the signed reference so /audio can answer with the right media type
+REF = re.compile(rf"^(\d+-(?:[0-9a-f]{{8}}-)?[0-9a-f]{{12}})\.(\d+)\.(\d+)\.({'|'.join(AUDIO_FORMATS)})\.([0-9a-f]{{16}})$")
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class Segment:
+    """One preallocated, memory-mapped spool file; entries are appended and never rewritten"""
+
+    def __init__(self, path: str, size: int = 0):
+        self.path = path
+        self.writable = size > 0
+        self.file = open(path, "w+b" if self.writable else "rb")
+        if self.writable:
+            # Sparse on most filesystems; disk is used only as audio is written
+            self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+        self.size = len(self.map)
+        self.used = 0
+
+    def read(self, offset: int, count: int) -> bytes:
+        return self.map[offset:offset + count]
+
+    def append(self, data: bytes) -> int:
+        offset = self.used
+        self.map[offset:offset + len(data)] = data
+        self.used += len(data)
+        return offset
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+class MisroutedAudio(Exception):
+    """A valid reference to a segment that another host wrote and this one cannot see"""
+
+    def __init__(self, owner: str):
+        super().__init__(f"Audio segment belongs to host {owner}")
+        self.owner = owner
+
+def _created(name: str) -> int:
+    return int(name.split("-", 1)[0])
+
+def _expired(name: str, now: float) -> bool:
+    return _created(name) + AUDIO_SPOOL_SEGMENT_SECONDS + AUDIO_SPOOL_TTL < now
+
+class AudioSpool:
+    """
+    Append-only store for synthesized audio on local disk, shared by the workers on a host
+    (or by every host when AUDIO_SPOOL_DIR is shared storage).
+
+    Each worker appends to its own segment and rolls to a new one when the segment
+    is full or too old. An append returns a short signed reference, and the
+    /audio endpoint serves it from whichever worker receives the request.
+    Expired segments are deleted whole, so there is no per-entry cleanup.
+    """
+
+    def __init__(self, secret: str, directory: str = AUDIO_SPOOL_DIR):
+        self.secret = secret.encode()
+        self.directory = directory
+        self.current: Optional[Tuple[str, Segment]] = None
+        # Open segments by name, for writing (our own) or for serving (any worker's)
+        self.segments: Dict[str, Segment] = {}
+        self.lock = threading.Lock()
+        self.last_reclaim = 0.0
+
+    def _sign(self, body: str) -> str:
+        return hmac.new(self.secret, body.encode(), hashlib.sha256).hexdigest()[:16]
+
+    def append(self, data: bytes, audio_format: str = "mp3") -> str:
+        """Store audio and return the reference clients fetch it by; does file I/O, so call it off the event loop"""
+        now = time.time()
+        with self.lock:
+            if self.current is None or not self._fits(self.current, len(data), now):
+                self._roll(len(data), now)
+            name, segment = self.current
+            offset = segment.append(data)
+        AUDIO_SPOOL_WRITTEN_BYTES.inc(len(data))
+        if now - self.last_reclaim > RECLAIM_INTERVAL:
+            self.reclaim(now)
+        body = f"{name}.{offset}.{len(data)}.{audio_format}"
+        return f"{body}.{self._sign(body)}"
+
+    def _fits(self, current: Tuple[str, Segment], size: int, now: float) -> bool:
+        name, segment = current
+        return segment.used + size <= segment.size and now - _created(name) < AUDIO_SPOOL_SEGMENT_SECONDS
+
+    def _roll(self, size: int, now: float):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(now)}-{HOST_ID}-{uuid.uuid4().hex[:12]}"
+        segment = Segment(os.path.join(self.directory, f"{name}.seg"), max(AUDIO_SPOOL_SEGMENT_BYTES, size))
+        # The previous segment stays open for reads until it expires
+        self.segments[name] = segment
+        self.current = (name, segment)
+
+    def locate(self, ref: str) -> Optional[Tuple[Segment, int, int, str]]:
+        """
+        Segment, offset, length and audio format for a reference, or None if it is forged, malformed
+        or expired; may open a file. Raises MisroutedAudio when another host's segment is not on this disk.
+        """
+        match = REF.match(ref)
+        if not match:
+            return None
+        name, offset, length, audio_format, signature = match.group(1), int(match.group(2)), int(match.group(3)), match.group(4), match.group(5)
+        if not hmac.compare_digest(signature, self._sign(f"{name}.{offset}.{length}.{audio_format}")) or _expired(name, time.time()):
+            return None
+        with self.lock:
+            segment = self.segments.get(name)
+            if segment is None:
+                path = os.path.join(self.directory, f"{name}.seg")
+                try:
+                    segment = self.segments[name] = Segment(path)
+                except FileNotFoundError:
+                    owner = SEGMENT_NAME.match(name).group(2)
+                    if owner and owner != HOST_ID:
+                        raise MisroutedAudio(owner)
+                    return None
+                except ValueError:
+                    return None
+        if offset + length > segment.size:
+            return None
+        return segment, offset, length, audio_format
+
+    def reclaim(self, now: Optional[float] = None):
+        """Delete expired segments, including those left behind by other or crashed workers"""
+        now = now or time.time()
+        self.last_reclaim = now
+        with self.lock:
+            for name in [name for name in self.segments if _expired(name, now)]:
+                self.segments.pop(name).close()
+        try:
+            entries = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            name = entry[:-4]
+            if entry.endswith(".seg") and SEGMENT_NAME.match(name) and _expired(name, now):
+                try:
+                    os.unlink(os.path.join(self.directory, entry))
+                    AUDIO_SPOOL_RECLAIMED_SEGMENTS.inc()
+                except FileNotFoundError:
+                    pass  # Another worker got there first
+                except OSError as e:
+                    logger.warning(f"Failed to reclaim audio spool segment {entry}: {e}")
+
+    def close(self):
+        with self.lock:
+            for segment in self.segments.values():
+                segment.close()
+            self.segments.clear()
+            self.current = None
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """First and last byte requested by a single-range Range header; None when it cannot be satisfied"""
+    if not header:
+        return 0, length - 1
+    match = BYTE_RANGE.match(header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if not match.group(1):
+        # Suffix range: the last N bytes
+        suffix = int(match.group(2))
+        return (max(0, length - suffix), length - 1) if suffix else None
+    first = int(match.group(1))
+    last = min(int(match.group(2)), length - 1) if match.group(2) else length - 1
+    return (first, last) if first <= last else None
@@ -0,0 +1,375 @@
+"""
+Discrete-event simulator for interview admission capacity.
+
+Models the admission path (add_to_queue, check_and_promote_users, the interview
+timer and the concurrent interview limit) and each admitted interview turn by
+turn: think time, STT, the LLM stream and TTS. Timings are drawn from recorded
+session traces, a /metrics scrape, or built-in defaults. Predicts queue wait
+percentiles, slot utilization and upstream request rates without running live load.
+
+    python capacity_simulator.py --pattern burst --burst-size 60 --limit 5,10,20
+    python capacity_simulator.py --traces traces/ --rate 3 --duration 120 --adaptive --llm-concurrency 20
+    python capacity_simulator.py --metrics http://localhost:8000/metrics --pattern waves --wave-size 25
+"""
+import argparse
+import heapq
+import json
+import math
+import random
+import re
+import urllib.request
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from admission_limit import ADMISSION_INITIAL_LIMIT, ADMISSION_TARGET_LATENCY, ADMISSION_WINDOW_SECONDS, next_limit
+from session_recorder import load_trace
+
+# Matches RedisService.INTERVIEW_DURATION
+INTERVIEW_DURATION = 600
+
+Sampler = Callable[[random.Random], float]
+
+def lognormal(median: float, sigma: float = 0.4) -> Sampler:
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+# Seconds, except tts_per_turn; used for anything the traces or metrics do not cover
+DEFAULT_TIMINGS: Dict[str, Sampler] = {
+    "think": lognormal(45.0, 0.5),  # interviewer audio playing, the candidate answering, and the upload
+    "stt": lognormal(1.5),
+    "ttft": lognormal(0.7),
+    "stream": lognormal(4.0),
+    "tts": lognormal(0.9),
+    "tts_per_turn": lambda rng: float(rng.randint(2, 5)),
+}
+
+# Histograms on /metrics that map onto a timing
+METRIC_TIMINGS = {
+    "stt": "interview_stt_duration_seconds",
+    "ttft": "interview_llm_time_to_first_token_seconds",
+    "stream": "interview_llm_stream_duration_seconds",
+    "tts": "interview_tts_duration_seconds",
+    "tts_per_turn": "interview_tts_chunks_per_turn",
+}
+BUCKET_LINE = re.compile(r'^(\w+)_bucket\{(.*)\}\s+(\S+)$')
+LE_LABEL = re.compile(r'le="([^"]+)"')
+
+def empirical(samples: List[float]) -> Sampler:
+    return lambda rng: rng.choice(samples)
+
+def timings_from_traces(directory: str) -> Dict[str, Sampler]:
+    """Empirical samplers from session traces recorded with RECORD_TRACE_DIR"""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for path in sorted(Path(directory).glob("*.json*")):
+        tts_in_turn = None
+        for event in load_trace(str(path))["events"]:
+            if event["type"] == "llm_turn":
+                if tts_in_turn:
+                    samples["tts_per_turn"].append(float(tts_in_turn))
+                tts_in_turn = 0
+                samples["ttft"].append(event["first_chunk_ms"] / 1000)
+                samples["stream"].append(sum(delay for delay, _ in event["chunks"]) / 1000)
+            elif event["type"] == "tts":
+                samples["tts"].append(event["latency_ms"] / 1000)
+                if tts_in_turn is not None:
+                    tts_in_turn += 1
+            elif event["type"] == "stt":
+                samples["stt"].append(event["latency_ms"] / 1000)
+            elif event["type"] == "client_answer":
+                samples["think"].append(event["think_ms"] / 1000)
+        if tts_in_turn:
+            samples["tts_per_turn"].append(float(tts_in_turn))
+    return {name: empirical(values) for name, values in samples.items() if values}
+
+def histogram_sampler(buckets: Dict[float, float]) -> Optional[Sampler]:
+    """Sample a Prometheus histogram: pick a bucket by its count, then a point inside it"""
+    bounds = sorted(buckets)
+    ranges, weights, lower, previous = [], [], 0.0, 0.0
+    for upper in bounds:
+        count = buckets[upper] - previous
+        previous = buckets[upper]
+        if count > 0:
+            # The +Inf bucket has no upper edge; treat its samples as sitting on the last finite one
+            ranges.append((lower, upper if math.isfinite(upper) else lower))
+            weights.append(count)
+        if math.isfinite(upper):
+            lower = upper
+    if not weights:
+        return None
+    return lambda rng: rng.uniform(*rng.choices(ranges, weights)[0])
+
+def timings_from_metrics(source: str) -> Dict[str, Sampler]:
+    """Samplers from the backend's histograms, summed over label sets, read from a URL or a saved scrape"""
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=10) as response:
+            text = response.read().decode()
+    else:
+        text = Path(source).read_text()
+    buckets: Dict[str, Dict[float, float]] = defaultdict(lambda: defaultdict(float))
+    for line in text.splitlines():
+        match = BUCKET_LINE.match(line)
+        if match:
+            le = LE_LABEL.search(match.group(2))
+            if le:
+                buckets[match.group(1)][float(le.group(1))] += float(match.group(3))
+    timings = {}
+    for name, metric in METRIC_TIMINGS.items():
+        sampler = histogram_sampler(buckets.get(metric, {}))
+        if sampler:
+            timings[name] = sampler
+    return timings
+
+def arrival_times(args, rng: random.Random) -> List[float]:
+    """Candidate arrival times in seconds for the chosen pattern"""
+    horizon = args.duration * 60
+    times = []
+    if args.pattern in ("poisson", "burst"):
+        t = 0.0
+        while args.rate > 0:
+            t += rng.expovariate(args.rate / 60)
+            if t >= horizon:
+                break
+            times.append(t)
+    if args.pattern == "burst":
+        # Everyone invited to a hiring event opens the link within the first minute or two
+        times += [rng.uniform(0, args.burst_spread) for _ in range(args.burst_size)]
+    elif args.pattern == "waves":
+        for start in range(0, int(horizon), int(args.wave_interval * 60)):
+            times += [start + rng.uniform(0, args.burst_spread) for _ in range(args.wave_size)]
+    return sorted(times)
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 2)
+
+    return {
+        "count": len(ordered), "p50": pct(50), "p90": pct(90), "p95": pct(95), "p99": pct(99), "max": round(ordered[-1], 2)
+    }
+
+class Candidate:
+    def __init__(self, index: int, arrived: float):
+        self.index = index
+        self.arrived = arrived
+        self.admitted: Optional[float] = None
+        self.abandoned = False
+        self.llm_requested = 0.0
+
+class Simulation:
+    """One run of the admission queue and the interviews it admits, under a fixed or adaptive limit"""
+
+    def __init__(self, args, timings: Dict[str, Sampler], limit: Optional[int], seed: int):
+        self.args = args
+        self.timings = timings
+        self.rng = random.Random(seed)
+        self.adaptive = limit is None
+        self.limit = ADMISSION_INITIAL_LIMIT if self.adaptive else limit
+        self.events: List = []
+        self.sequence = 0
+        self.now = 0.0
+        self.queue: deque = deque()
+        self.active = 0
+        self.llm_busy = 0
+        self.llm_waiting: deque = deque()
+        self.queue_waits: List[float] = []
+        self.abandoned_waits: List[float] = []
+        self.first_audio: List[float] = []
+        self.requests: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.window = {"turns": 0, "errors": 0, "slow": 0}
+        self.limit_history: List[int] = [self.limit]
+        self.completed = 0
+        self.peak_active = 0
+        self.peak_llm = 0
+        self.active_area = 0.0
+        self.limit_area = 0.0
+        self.last_change = 0.0
+
+    def sample(self, name: str) -> float:
+        return max(0.0, (self.timings.get(name) or DEFAULT_TIMINGS[name])(self.rng))
+
+    def schedule(self, at: float, handler: Callable, *data):
+        self.sequence += 1
+        heapq.heappush(self.events, (at, self.sequence, handler, data))
+
+    def count_request(self, operation: str, at: float):
+        self.requests[operation][int(at // 60)] += 1
+
+    def advance(self, to: float):
+        # Time-weighted slot usage for utilization
+        self.active_area += self.active * (to - self.last_change)
+        self.limit_area += self.limit * (to - self.last_change)
+        self.last_change = self.now = to
+
+    def run(self) -> Dict:
+        arrivals = arrival_times(self.args, self.rng)
+        for index, at in enumerate(arrivals):
+            self.schedule(at, self.arrive, Candidate(index, at))
+        if self.adaptive:
+            self.schedule(ADMISSION_WINDOW_SECONDS, self.adjust_limit)
+        while self.events:
+            at, _, handler, data = heapq.heappop(self.events)
+            self.advance(at)
+            handler(*data)
+        return self.report(len(arrivals))
+
+    def arrive(self, candidate: Candidate):
+        # /join-interview-queue: straight in if a slot is free, otherwise to the back of the queue
+        if self.active < self.limit and not self.queue:
+            self.admit(candidate)
+            return
+        self.queue.append(candidate)
+        if self.args.patience:
+            self.schedule(self.now + self.args.patience, self.abandon, candidate)
+
+    def abandon(self, candidate: Candidate):
+        if candidate.admitted is None and not candidate.abandoned:
+            candidate.abandoned = True
+            self.abandoned_waits.append(self.now - candidate.arrived)
+
+    def admit(self, candidate: Candidate):
+        candidate.admitted = self.now
+        self.queue_waits.append(self.now - candidate.arrived)
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        # The opening turn starts as soon as the WebSocket connects
+        self.schedule(self.now, self.request_llm, candidate)
+
+    def promote(self):
+        # check_and_promote_users
+        while self.active < self.limit and self.queue:
+            candidate = self.queue.popleft()
+            if not candidate.abandoned:
+                self.admit(candidate)
+
+    def request_llm(self, candidate: Candidate):
+        candidate.llm_requested = self.now
+        if self.args.llm_concurrency and self.llm_busy >= self.args.llm_concurrency:
+            self.llm_waiting.append(candidate)
+        else:
+            self.start_llm(candidate)
+
+    def start_llm(self, candidate: Candidate):
+        self.llm_busy += 1
+        self.peak_llm = max(self.peak_llm, self.llm_busy)
+        self.count_request("llm", self.now)
+        ttft, stream, tts = self.sample("ttft"), self.sample("stream"), self.sample("tts")
+        chunks = max(1, round(self.sample("tts_per_turn")))
+        for index in range(chunks):
+            self.count_request("tts", self.now + ttft + (stream - ttft) * index / chunks)
+        latency = self.now - candidate.llm_requested + ttft + tts
+        self.first_audio.append(latency)
+        self.window["turns"] += 1
+        self.window["slow"] += latency > ADMISSION_TARGET_LATENCY
+        self.window["errors"] += self.rng.random() < self.args.error_rate
+        self.schedule(self.now + max(stream, ttft), self.finish_llm, candidate, tts)
+
+    def finish_llm(self, candidate: Candidate, tts: float):
+        self.llm_busy -= 1
+        if self.llm_waiting:
+            self.start_llm(self.llm_waiting.popleft())
+        ends_at = candidate.admitted + self.args.interview_duration
+        next_answer = self.now + tts + self.sample("think")
+        if next_answer >= ends_at:
+            # The timer runs out before the candidate answers again
+            self.schedule(max(self.now, ends_at), self.leave, candidate)
+            return
+        self.count_request("stt", max(self.now, next_answer - self.sample("stt")))
+        self.schedule(next_answer, self.request_llm, candidate)
+
+    def leave(self, candidate: Candidate):
+        # /leave-interview frees the slot and promotes from the queue
+        self.active -= 1
+        self.completed += 1
+        self.promote()
+
+    def adjust_limit(self):
+        saturated = self.active >= self.limit and any(not c.abandoned for c in self.queue)
+        previous = self.limit
+        self.limit, _ = next_limit(self.limit, self.window["turns"], self.window["errors"], self.window["slow"], saturated)
+        self.window = {"turns": 0, "errors": 0, "slow": 0}
+        self.limit_history.append(self.limit)
+        if self.limit > previous:
+            self.promote()
+        # Keep ticking only while candidates are still arriving or interviewing, so the run can finish
+        if self.events:
+            self.schedule(self.now + ADMISSION_WINDOW_SECONDS, self.adjust_limit)
+
+    def report(self, arrivals: int) -> Dict:
+        minutes = max(1, math.ceil(self.now / 60))
+        return {
+            "limit": "adaptive" if self.adaptive else self.limit_history[0],
+            "candidates": {
+                "arrived": arrivals,
+                "admitted": len(self.queue_waits),
+                "completed": self.completed,
+                "abandoned": len(self.abandoned_waits)
+            },
+            # Over every candidate who left the queue; counting only the admitted hides the longest waits
+            "queue_wait_seconds": percentiles(self.queue_waits + self.abandoned_waits),
+            "admitted_queue_wait_seconds": percentiles(self.queue_waits),
+            "abandoned_wait_seconds": percentiles(self.abandoned_waits),
+            "first_audio_seconds": percentiles(self.first_audio),
+            "slot_utilization": round(self.active_area / self.limit_area, 3) if self.limit_area else 0.0,
+            "peak_active_interviews": self.peak_active,
+            "peak_concurrent_llm_streams": self.peak_llm,
+            "upstream_requests_per_minute": {
+                operation: {
+                    "mean": round(sum(per_minute.values()) / minutes, 1),
+                    "peak": max(per_minute.values())
+                }
+                for operation, per_minute in sorted(self.requests.items())
+            },
+            "simulated_minutes": round(self.now / 60, 1),
+            **({"admission_limit": {
+                "min": min(self.limit_history),
+                "max": max(self.limit_history),
+                "final": self.limit_history[-1]
+            }} if self.adaptive else {})
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the interview admission queue under different arrival patterns and limits")
+    parser.add_argument("--pattern", choices=["poisson", "burst", "waves"], default="poisson")
+    parser.add_argument("--rate", type=float, default=2.0, help="background arrivals per minute")
+    parser.add_argument("--duration", type=float, default=60, help="minutes over which candidates arrive")
+    parser.add_argument("--burst-size", type=int, default=50, help="candidates arriving together with --pattern burst")
+    parser.add_argument("--burst-spread", type=float, default=120, help="seconds over which a burst or wave arrives")
+    parser.add_argument("--wave-size", type=int, default=20, help="candidates per wave with --pattern waves")
+    parser.add_argument("--wave-interval", type=float, default=15, help="minutes between waves")
+    parser.add_argument("--limit", default="5", help="comma-separated concurrent interview limits to compare")
+    parser.add_argument("--adaptive", action="store_true", help="also run with the adaptive admission limit")
+    parser.add_argument("--interview-duration", type=float, default=INTERVIEW_DURATION, help="seconds")
+    parser.add_argument("--patience", type=float, default=0, help="seconds before a queued candidate gives up; 0 never")
+    parser.add_argument("--llm-concurrency", type=int, default=0, help="provider limit on concurrent LLM streams; 0 unlimited")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of turns that fail")
+    parser.add_argument("--traces", help="directory of recorded session traces to draw timings from")
+    parser.add_argument("--metrics", help="/metrics URL or saved scrape to draw timings from")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="optional path to write the JSON report to")
+    args = parser.parse_args()
+
+    # Traces are the most specific source, then metrics, then the defaults
+    timings: Dict[str, Sampler] = {}
+    if args.metrics:
+        timings.update(timings_from_metrics(args.metrics))
+    if args.traces:
+        timings.update(timings_from_traces(args.traces))
+
+    limits: List[Optional[int]] = [int(limit) for limit in args.limit.split(",") if limit.strip()]
+    if args.adaptive:
+        limits.append(None)
+    # The same seed for every run, so limits are compared on the same arrivals
+    report = {
+        "timing_sources": {name: "measured" if name in timings else "default" for name in DEFAULT_TIMINGS},
+        "runs": [Simulation(args, timings, limit, args.seed).run() for limit in limits]
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import math
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Set, Tuple
+
+# Rough token budgets for what is sent to the prompt-generation model
+RESUME_TOKEN_BUDGET = int(os.getenv('RESUME_TOKEN_BUDGET', 1200))
+JOB_DESCRIPTION_TOKEN_BUDGET = int(os.getenv('JOB_DESCRIPTION_TOKEN_BUDGET', 800))
+
+# Job description statements that carry no signal for interview questions, matched as whole
+# statements: legal notices and application instructions. Never applied to resumes.
+BOILERPLATE = re.compile(
+    r"(is|are) an equal (employment )?opportunity|^equal (employment )?opportunity( employer)?\b|"
+    r"affirmative action employer|all qualified applicants will receive|without regard to (race|age|sex|religion)|"
+    r"reasonable accommodations? (is|are|will be) (available|provided)|\bparticipates? in e-verify|"
+    r"drug[- ]free workplace|^(click here to )?apply (now|today|online)\W*$|^click here to apply|"
+    r"^follow us on\b|^(please )?(see|read|review) our privacy (policy|notice)",
+    re.IGNORECASE
+)
+# Job description sections dropped whole: perks, legal notices, application instructions
+BOILERPLATE_SECTION = re.compile(
+    r"benefit|perk|what we offer|equal (employment )?opportunity|\beeo\b|how to apply|privacy|disclaimer|legal notice",
+    re.IGNORECASE
+)
+# Sections whose lines are never filtered, whatever they mention
+PROTECTED_SECTION = re.compile(
+    r"experience|work history|responsibilit|what you.?ll (do|need)|requirement|qualification|"
+    r"must have|skills|project",
+    re.IGNORECASE
+)
+
+# Relevance of a section by its heading; unknown headings sit in the middle
+SECTION_WEIGHTS = [
+    (re.compile(r"experience|employment|work history|responsibilit|what you.?ll do|the role", re.I), 3.0),
+    (re.compile(r"requirement|qualification|what you.?ll need|must have|skills|technolog|stack", re.I), 3.0),
+    (re.compile(r"project|achievement|accomplishment|impact", re.I), 2.5),
+    (re.compile(r"summary|profile|objective|about (the )?(role|position|job)", re.I), 2.0),
+    (re.compile(r"nice to have|preferred|bonus|education|certification", re.I), 1.5),
+    (re.compile(r"about (us|the company)|who we are|our (mission|values|culture)", re.I), 1.0),
+    (re.compile(r"benefit|perk|compensation|salary|interest|hobb|reference|volunteer", re.I), 0.3),
+]
+DEFAULT_SECTION_WEIGHT = 1.5
+
+BULLET = re.compile(r"^[•‣▪●◦⁃∙*\-–—>]+\s*")
+WORD = re.compile(r"[a-z][a-z0-9+#.]{2,}")
+STOPWORDS = frozenset(
+    "the and for with you our are will your this that from have has who can all any its their they "
+    "work team teams role including such into about more other using use within across based".split()
+)
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count; about four characters per token for English text"""
+    return math.ceil(len(text) / 4)
+
+def normalize(text: str) -> List[str]:
+    """Unicode-normalize, unify bullets and whitespace, and drop blank lines"""
+    text = unicodedata.normalize("NFKC", text).replace("\r", "\n")
+    lines = []
+    for raw in text.split("\n"):
+        line = re.sub(r"\s+", " ", raw).strip()
+        if not line:
+            continue
+        if BULLET.match(line):
+            line = BULLET.sub("- ", line)
+        lines.append(line)
+    return lines
+
+def _is_heading(line: str) -> bool:
+    words = line.rstrip(":").split()
+    if not words or len(words) > 6 or line.startswith("- ") or line.endswith((".", ",", ";")):
+        return False
+    return line.endswith(":") or line.isupper() or _is_known_heading(line)
+
+def _keywords(text: str) -> Set[str]:
+    return {word for word in WORD.findall(text.lower()) if word not in STOPWORDS}
+
+def _split_sections(lines: List[str]) -> List[Dict[str, Any]]:
+    sections = [{"heading": "", "lines": []}]
+    for line in lines:
+        if _is_heading(line):
+            sections.append({"heading": line, "lines": []})
+        else:
+            sections[-1]["lines"].append(line)
+    # A recognised heading with nothing under it is only a label; other short lines (a name, a company) stay
+    return [s for s in sections if s["lines"] or (s["heading"] and not _is_known_heading(s["heading"]))]
+
+def _is_known_heading(heading: str) -> bool:
+    return any(pattern.search(heading) for pattern, _ in SECTION_WEIGHTS)
+
+def _section_weight(heading: str) -> float:
+    for pattern, weight in SECTION_WEIGHTS:
+        if pattern.search(heading):
+            return weight
+    return DEFAULT_SECTION_WEIGHT
+
+def compact_document(
+    text: str, token_budget: int, keywords: Set[str] = frozenset(), strip_boilerplate: bool = False
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Deterministically shrink a resume or job description to fit a token budget.
+    Removes duplicate lines and, with strip_boilerplate, job-posting boilerplate,
+    then keeps the most relevant sections (by heading and overlap with keywords) in their original order.
+    """
+    original_tokens = estimate_tokens(text)
+    seen: Set[str] = set()
+    kept, duplicates, boilerplate = [], 0, 0
+    heading = ""
+    for line in normalize(text):
+        if _is_heading(line):
+            heading = line
+        key = re.sub(r"[^a-z0-9]+", " ", line.lower()).strip()
+        # Headings repeat legitimately, e.g. one "Responsibilities" per job on a resume
+        if key in seen and not _is_heading(line):
+            duplicates += 1
+            continue
+        seen.add(key)
+        if strip_boilerplate and _is_boilerplate(line, heading):
+            boilerplate += 1
+            continue
+        kept.append(line)
+
+    sections = _split_sections(kept)
+    for index, section in enumerate(sections):
+        body = "\n".join(section["lines"])
+        section["text"] = "\n".join(filter(None, [section["heading"], body]))
+        section["tokens"] = estimate_tokens(section["text"])
+        overlap = len(_keywords(body) & keywords) / (1 + len(_keywords(body))) if keywords else 0
+        # Earlier sections win ties; the opening lines usually name the person or the role
+        section["score"] = _section_weight(section["heading"]) * (1 + overlap) - index * 0.01
+
+    # Fill the budget with the best sections, trimming the first one that does not fit whole
+    remaining = token_budget
+    chosen: Dict[int, str] = {}
+    for index in sorted(range(len(sections)), key=lambda i: -sections[i]["score"]):
+        section = sections[index]
+        if section["tokens"] <= remaining:
+            chosen[index] = section["text"]
+            remaining -= section["tokens"] + 1
+        elif remaining > 20:
+            partial = []
+            for line in filter(None, [section["heading"]] + section["lines"]):
+                cost = estimate_tokens(line) + 1
+                if cost > remaining:
+                    break
+                partial.append(line)
+                remaining -= cost
+            if partial:
+                chosen[index] = "\n".join(partial)
+
+    compacted = "\n\n".join(chosen[i] for i in sorted(chosen))
+    compacted_tokens = estimate_tokens(compacted)
+    return compacted, {
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "saved_tokens": original_tokens - compacted_tokens,
+        "saved_pct": round(100 * (original_tokens - compacted_tokens) / original_tokens, 1) if original_tokens else 0.0,
+        "duplicate_lines": duplicates,
+        "boilerplate_lines": boilerplate,
+        "dropped_sections": [s["heading"] or "(untitled)" for i, s in enumerate(sections) if i not in chosen]
+    }
+
+def _is_boilerplate(line: str, heading: str) -> bool:
+    if PROTECTED_SECTION.search(heading):
+        return False
+    if heading and BOILERPLATE_SECTION.search(heading):
+        return True
+    return bool(BOILERPLATE.search(line.lstrip("- ")))
+
+def compact_documents(resume: str, job_description: str) -> Tuple[str, str, Dict[str, Any]]:
+    """Compact both documents, ranking resume sections by overlap with the job description"""
+    compact_jd, jd_report = compact_document(job_description, JOB_DESCRIPTION_TOKEN_BUDGET, strip_boilerplate=True)
+    compact_resume, resume_report = compact_document(resume, RESUME_TOKEN_BUDGET, _keywords(compact_jd))
+    return compact_resume, compact_jd, {"resume": resume_report, "job_description": jd_report}
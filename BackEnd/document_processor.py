@@ -1,37 +1,129 @@
-from PyPDF2 import PdfReader
+from PyPDF2 import PdfReader, PdfWriter
 import docx
 from fastapi import UploadFile, HTTPException
+import asyncio
+import hashlib
 import io
 import logging
+import os
+import zipfile
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from executors import run_in_process, run_in_thread
+
+logger = logging.getLogger(__name__)
+
+MAX_DOCUMENT_BYTES = int(os.getenv('MAX_DOCUMENT_BYTES', 10 * 1024 * 1024))
+# Pages handed to one worker; PDFs up to this size are parsed in a single task
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', 8))
+DOCUMENT_CACHE_SIZE = int(os.getenv('DOCUMENT_CACHE_SIZE', 256))
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT = "text/plain"
+
+def detect_content_type(content: bytes) -> str:
+    """Identify an upload from its bytes rather than the client-supplied name or type"""
+    try:
+        import magic
+        mime = magic.from_buffer(content[:4096], mime=True)
+    except ImportError:
+        # libmagic is missing; the three supported formats are easy to tell apart by signature
+        mime = PDF if content.startswith(b"%PDF") else "application/zip" if content.startswith(b"PK") else TEXT
+    # Older libmagic reports DOCX files as plain zip archives
+    if mime in ("application/zip", "application/octet-stream") and content.startswith(b"PK"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return DOCX
+        except zipfile.BadZipFile:
+            pass
+    return mime
+
+# The functions below run in the process pool, so they are module-level and take plain bytes
+
+def split_pdf(content: bytes, pages_per_part: int) -> Tuple[int, List[str], List[bytes]]:
+    """
+    Parse a PDF once. Short documents have their text extracted here; longer ones are
+    cut into standalone PDFs of pages_per_part pages, so each part is parsed on its own.
+    """
+    pages = PdfReader(io.BytesIO(content)).pages
+    if len(pages) <= pages_per_part:
+        return len(pages), [page.extract_text() or "" for page in pages], []
+    parts = []
+    for start in range(0, len(pages), pages_per_part):
+        writer = PdfWriter()
+        for page in pages[start:start + pages_per_part]:
+            writer.add_page(page)
+        out = io.BytesIO()
+        writer.write(out)
+        parts.append(out.getvalue())
+    return len(pages), [], parts
+
+def extract_pdf_pages(content: bytes) -> List[str]:
+    return [page.extract_text() or "" for page in PdfReader(io.BytesIO(content)).pages]
+
+def extract_docx_text(content: bytes) -> str:
+    doc = docx.Document(io.BytesIO(content))
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs)
 
 class DocumentProcessor:
     """Handles document uploads and text extraction"""
-    
+
+    def __init__(self):
+        # Extracted text by content hash; the same resume is often uploaded repeatedly
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
     async def extract_text(self, file: UploadFile) -> str:
         """Extract text from uploaded documents"""
+        return (await self.extract(await file.read()))["text"]
+
+    async def extract(self, content: bytes) -> Dict[str, Any]:
+        """Detect the document type and extract its text; parsing happens in the process pool"""
+        if not content:
+            raise HTTPException(status_code=422, detail="Uploaded file is empty")
+        if len(content) > MAX_DOCUMENT_BYTES:
+            raise HTTPException(status_code=413, detail=f"Document exceeds {MAX_DOCUMENT_BYTES} bytes")
+
+        digest = await run_in_thread("document_hash", lambda: hashlib.sha256(content).hexdigest())
+        cached = self.cache.get(digest)
+        if cached:
+            self.cache.move_to_end(digest)
+            return {**cached, "cached": True}
+
+        content_type = detect_content_type(content)
+        if content_type == PDF:
+            text, pages = await self._extract_from_pdf(content)
+        elif content_type == DOCX:
+            text, pages = await self._extract_from_docx(content), None
+        elif content_type.startswith("text/"):
+            text, pages = content.decode('utf-8', errors='replace'), None
+        else:
+            raise HTTPException(status_code=415, detail=f"Unsupported document type: {content_type}")
+
+        result = {"text": text.strip(), "content_type": content_type, "pages": pages}
+        self.cache[digest] = result
+        while len(self.cache) > DOCUMENT_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return {**result, "cached": False}
+
+    async def _extract_from_pdf(self, content: bytes):
+        """Extract text from PDF content; long documents are split once and their parts parsed in parallel"""
         try:
-            content = await file.read()
-            # For now, assume it's plain text
-            return content.decode('utf-8')
-        except Exception as e:
-            logging.error(f"Document processing error: {str(e)}")
-            raise ValueError("Failed to process document")
-        
-    def _extract_from_pdf(self, content: bytes) -> str:
-        """Extract text from PDF content"""
-        try:
-            pdf = PdfReader(io.BytesIO(content))
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            page_count, texts, parts = await run_in_process("pdf_split", split_pdf, content, PDF_PAGES_PER_TASK)
+            if parts:
+                batches = await asyncio.gather(*[run_in_process("pdf_pages", extract_pdf_pages, part) for part in parts])
+                texts = [page for batch in batches for page in batch]
+            return "\n".join(texts), page_count
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
-            
-    def _extract_from_docx(self, content: bytes) -> str:
+            logger.error(f"PDF extraction failed: {e}")
+            raise HTTPException(status_code=422, detail=f"Error processing PDF: {str(e)}")
+
+    async def _extract_from_docx(self, content: bytes) -> str:
         """Extract text from DOCX content"""
         try:
-            doc = docx.Document(io.BytesIO(content))
-            return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+            return await run_in_process("docx_text", extract_docx_text, content)
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing DOCX: {str(e)}")
\ No newline at end of file
+            logger.error(f"DOCX extraction failed: {e}")
+            raise HTTPException(status_code=422, detail=f"Error processing DOCX: {str(e)}")
@@ -0,0 +1,52 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from metrics import OFFLOAD_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Both pools default to one worker per core
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', os.cpu_count() or 2))
+
+# Threads suit short work on data already in memory (encoding, serialization);
+# processes suit long pure-Python work (transcoding, document parsing) that would hold the GIL
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _threads() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+    return _thread_pool
+
+def _processes() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # Spawned rather than forked so workers do not inherit the event loop or open sockets
+        _process_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+async def run_in_thread(task: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run CPU-bound work on the shared thread pool, off the event loop"""
+    with OFFLOAD_DURATION.labels(pool="thread", task=task).time():
+        return await asyncio.get_running_loop().run_in_executor(_threads(), functools.partial(func, *args, **kwargs))
+
+async def run_in_process(task: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run CPU-heavy work in the process pool; func and its arguments must be picklable"""
+    with OFFLOAD_DURATION.labels(pool="process", task=task).time():
+        return await asyncio.get_running_loop().run_in_executor(_processes(), functools.partial(func, *args, **kwargs))
+
+def shutdown():
+    global _thread_pool, _process_pool
+    for pool in (_thread_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    _thread_pool = _process_pool = None
@@ -0,0 +1,306 @@
+"""
+Local stand-in for the upstream AI providers, for offline and repeatable performance testing.
+
+Speaks enough of each protocol for the backend's clients:
+- OpenAI / Deepseek chat completions, streaming and non-streaming
+- OpenAI audio speech and audio transcriptions
+- Anthropic messages
+
+With --replay (or POST /_replay) it serves the LLM streams, TTS and STT
+responses of a trace recorded with RECORD_TRACE_DIR, in order and with the
+recorded timing, instead of synthetic responses.
+
+Point the backend at it with:
+    OPENAI_BASE_URL=http://localhost:9000/v1
+    DEEPSEEK_BASE_URL=http://localhost:9000/v1
+    ANTHROPIC_BASE_URL=http://localhost:9000
+
+Usage:
+    python fake_providers.py --port 9000 --latency-ms 400 --tokens-per-sec 40 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from session_recorder import load_trace
+
+INTERVIEWER_REPLY = (
+    "Thanks for walking me through that. It sounds like you handled a lot of ambiguity there. "
+    "What was the hardest trade-off you had to make, and how did you decide?"
+)
+
+# Prompt generation asks for a structured brief and renders the interviewer prompt itself
+INTERVIEW_BRIEF = json.dumps({
+    "candidate_name": "Alex Doe",
+    "company_name": "Example Corp",
+    "job_summary": "Backend engineer building real-time services.",
+    "candidate_summary": "Five years of Python and distributed systems experience.",
+    "questions": {
+        "behavioral": "Tell me about a project you are proud of?",
+        "role_specific": "How would you design a low-latency API?",
+        "technical": "How do you keep Redis access off the hot path?",
+        "culture_fit": "What kind of team do you do your best work in?",
+        "problem_solving": "How would you track down a sudden p99 regression?",
+        "experience_deep_dive": "Walk me through the hardest migration you led?",
+        "hypothetical": "What would you do if a dependency started timing out in production?",
+        "career_goals": "Where do you want to grow in the next few years?"
+    }
+})
+
+# Magic bytes, media type and size relative to MP3 for each TTS response_format
+SPEECH_FORMATS = {
+    "mp3": (b"ID3", "audio/mpeg", 1.0),
+    "opus": (b"OggS", "audio/ogg", 0.25),
+    "aac": (b"\xff\xf1", "audio/aac", 0.5),
+    "flac": (b"fLaC", "audio/flac", 4.0),
+    "wav": (b"RIFF", "audio/wav", 6.0),
+    "pcm": (b"", "audio/pcm", 6.0),
+}
+
+TRANSCRIPT = "I led the migration of our billing service and cut p99 latency in half."
+
+class FakeProviderConfig:
+    """Tunable behaviour of the stand-in providers; defaults come from FAKE_* environment variables"""
+
+    def __init__(self):
+        self.latency_ms = float(os.getenv("FAKE_LATENCY_MS", 300))  # time to first token/byte
+        self.tokens_per_sec = float(os.getenv("FAKE_TOKENS_PER_SEC", 50))
+        self.tts_latency_ms = float(os.getenv("FAKE_TTS_LATENCY_MS", 250))
+        self.audio_bytes_per_char = int(os.getenv("FAKE_AUDIO_BYTES_PER_CHAR", 400))
+        self.stt_latency_ms = float(os.getenv("FAKE_STT_LATENCY_MS", 500))
+        self.error_rate = float(os.getenv("FAKE_ERROR_RATE", 0))
+        self.error_status = int(os.getenv("FAKE_ERROR_STATUS", 429))
+        self.seed = int(os.getenv("FAKE_SEED", 1234))
+
+    def update(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            if hasattr(self, key) and value is not None:
+                setattr(self, key, type(getattr(self, key))(value))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+class ReplayScript:
+    """Upstream responses from a recorded session trace, consumed in the order they were recorded"""
+
+    def __init__(self, trace: Dict[str, Any]):
+        events = trace["events"]
+        self.llm_turns = deque(e for e in events if e["type"] == "llm_turn")
+        self.tts = deque(e for e in events if e["type"] == "tts")
+        self.stt = deque(e for e in events if e["type"] == "stt")
+
+    def remaining(self) -> Dict[str, int]:
+        return {"llm_turns": len(self.llm_turns), "tts": len(self.tts), "stt": len(self.stt)}
+
+config = FakeProviderConfig()
+rng = random.Random(config.seed)
+stats: Dict[str, int] = {}
+replay: Optional[ReplayScript] = None
+
+app = FastAPI(title="Fake AI providers")
+
+def _count(name: str):
+    stats[name] = stats.get(name, 0) + 1
+
+def _injected_error() -> Optional[JSONResponse]:
+    """Fail the request at the configured rate with a provider-shaped error body"""
+    if config.error_rate and rng.random() < config.error_rate:
+        _count("errors")
+        return JSONResponse(
+            status_code=config.error_status,
+            content={"error": {"message": "Injected failure", "type": "rate_limit_error"}}
+        )
+    return None
+
+def _tokens(text: str):
+    words = text.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    _count("chat_completions")
+    body = await request.json()
+    error = _injected_error()
+    if error:
+        return error
+
+    model = body.get("model", "fake-model")
+    created = int(time.time())
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+    if not body.get("stream"):
+        # Non-streaming calls are prompt generation, so answer with an interview brief
+        text = INTERVIEW_BRIEF
+        await asyncio.sleep(config.latency_ms / 1000 + len(_tokens(text)) / config.tokens_per_sec)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(_tokens(text)), "total_tokens": len(_tokens(text))}
+        }
+
+    def chunk(delta: Dict[str, str], finish_reason: Optional[str] = None) -> str:
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }) + "\n\n"
+
+    # Each recorded chunk carries its delay since the previous one; the first includes time to first token
+    if replay and replay.llm_turns:
+        timed_tokens = [(delay / 1000, content) for delay, content in replay.llm_turns.popleft()["chunks"]]
+    else:
+        timed_tokens = [(1 / config.tokens_per_sec, token) for token in _tokens(INTERVIEWER_REPLY)]
+        timed_tokens[0] = (config.latency_ms / 1000, timed_tokens[0][1])
+
+    async def stream():
+        yield chunk({"role": "assistant", "content": ""})
+        for delay, token in timed_tokens:
+            await asyncio.sleep(delay)
+            yield chunk({"content": token})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+@app.post("/v1/audio/speech")
+async def audio_speech(request: Request):
+    _count("audio_speech")
+    body = await request.json()
+    error = _injected_error()
+    if error:
+        return error
+    audio_format = body.get("response_format", "mp3")
+    if audio_format not in SPEECH_FORMATS:
+        return JSONResponse(
+            status_code=400,
+            content={"error": {"message": f"Invalid response_format {audio_format!r}", "type": "invalid_request_error"}}
+        )
+    _count(f"audio_speech_{audio_format}")
+    magic, media_type, scale = SPEECH_FORMATS[audio_format]
+
+    # Recorded sizes already reflect the format the session negotiated
+    if replay and replay.tts:
+        recorded = replay.tts.popleft()
+        await asyncio.sleep(recorded["latency_ms"] / 1000)
+        size = recorded["bytes"]
+    else:
+        await asyncio.sleep(config.tts_latency_ms / 1000)
+        size = max(1, int(len(body.get("input", "")) * config.audio_bytes_per_char * scale))
+    # The format's magic bytes keep clients that sniff the format happy; the rest is silence
+    audio = magic + bytes(size)
+    return Response(content=audio, media_type=media_type)
+
+@app.post("/v1/audio/transcriptions")
+async def audio_transcriptions(request: Request):
+    _count("audio_transcriptions")
+    form = await request.form()
+    error = _injected_error()
+    if error:
+        return error
+
+    upload = form.get("file")
+    size = len(await upload.read()) if upload is not None else 0
+    if replay and replay.stt:
+        recorded = replay.stt.popleft()
+        await asyncio.sleep(recorded["latency_ms"] / 1000)
+        text = recorded["text"] or TRANSCRIPT
+    else:
+        # Scale with upload size the way a real transcription service does
+        await asyncio.sleep(config.stt_latency_ms / 1000 * (1 + size / (1024 * 1024)))
+        text = TRANSCRIPT
+    if form.get("response_format") == "text":
+        return Response(content=text, media_type="text/plain")
+    return {"text": text}
+
+@app.post("/v1/messages")
+async def anthropic_messages(request: Request):
+    _count("anthropic_messages")
+    body = await request.json()
+    error = _injected_error()
+    if error:
+        return error
+
+    await asyncio.sleep(config.latency_ms / 1000 + len(_tokens(INTERVIEW_BRIEF)) / config.tokens_per_sec)
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:12]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "fake-claude"),
+        "content": [{"type": "text", "text": INTERVIEW_BRIEF}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 0, "output_tokens": len(_tokens(INTERVIEW_BRIEF))}
+    }
+
+@app.get("/_config")
+async def get_config():
+    return {"config": config.to_dict(), "stats": stats}
+
+@app.post("/_config")
+async def set_config(request: Request):
+    """Change latency, token rate, audio size or error injection without restarting"""
+    global rng
+    config.update(await request.json())
+    rng = random.Random(config.seed)
+    return {"config": config.to_dict()}
+
+@app.post("/_replay")
+async def set_replay(request: Request):
+    """Serve the upstream responses of a recorded session trace"""
+    global replay
+    replay = ReplayScript(await request.json())
+    return {"remaining": replay.remaining()}
+
+@app.get("/_replay")
+async def get_replay():
+    return {"remaining": replay.remaining() if replay else None}
+
+@app.delete("/_replay")
+async def clear_replay():
+    global replay
+    replay = None
+    return {"remaining": None}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-ins for the upstream AI providers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, dest="latency_ms")
+    parser.add_argument("--tokens-per-sec", type=float, dest="tokens_per_sec")
+    parser.add_argument("--tts-latency-ms", type=float, dest="tts_latency_ms")
+    parser.add_argument("--audio-bytes-per-char", type=int, dest="audio_bytes_per_char")
+    parser.add_argument("--stt-latency-ms", type=float, dest="stt_latency_ms")
+    parser.add_argument("--error-rate", type=float, dest="error_rate")
+    parser.add_argument("--error-status", type=int, dest="error_status")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--replay", help="session trace to serve upstream responses from")
+    args = parser.parse_args()
+
+    global rng, replay
+    if args.replay:
+        replay = ReplayScript(load_trace(args.replay))
+    config.update({k: v for k, v in vars(args).items() if k not in ("host", "port", "replay")})
+    rng = random.Random(config.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
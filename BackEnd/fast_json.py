@@ -0,0 +1,28 @@
+import importlib.util
+import json
+from typing import Any
+
+# orjson when installed, else the ujson we already ship, else the standard library
+if importlib.util.find_spec("orjson"):
+    import orjson
+    BACKEND = "orjson"
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    loads = orjson.loads
+elif importlib.util.find_spec("ujson"):
+    import ujson
+    BACKEND = "ujson"
+
+    def dumps(obj: Any) -> str:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    loads = ujson.loads
+else:
+    BACKEND = "json"
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    loads = json.loads
@@ -0,0 +1,248 @@
+"""
+End-to-end load generator for the interview backend.
+
+Simulates N candidates going through the full flow: /generate-token,
+/process-documents, /join-interview-queue (waiting on /queue-status when
+queued), /ws/interview turns with /transcribe uploads in between, and
+/leave-interview. Reports latency percentiles and error rates as JSON.
+
+Run it against a backend pointed at fake_providers.py and a local Redis:
+    python load_test.py --base-url http://localhost:8000 --users 20 --turns 3
+"""
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import struct
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+RESUME = "Alex Doe. Backend engineer. Five years of Python, FastAPI, Redis and distributed systems."
+JOB_DESCRIPTION = "Example Corp is hiring a backend engineer to build real-time, low-latency services."
+
+class LoadStats:
+    """Latency samples in milliseconds and error counts, keyed by stage"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.attempts: Dict[str, int] = defaultdict(int)
+        self.audio_formats: Dict[str, int] = defaultdict(int)  # Negotiated format per connection
+        self.sentence_bytes: List[float] = []
+
+    def record(self, stage: str, started: float):
+        self.samples[stage].append((time.perf_counter() - started) * 1000)
+
+    def report(self) -> Dict:
+        return {
+            "latency_ms": {stage: summarize(values) for stage, values in sorted(self.samples.items())},
+            "errors": dict(self.errors),
+            "error_rate": {
+                stage: round(self.errors[stage] / attempts, 4)
+                for stage, attempts in sorted(self.attempts.items()) if attempts
+            },
+            "audio": {
+                "formats": dict(self.audio_formats),
+                "sentence_bytes": summarize(self.sentence_bytes) if self.sentence_bytes else {"count": 0}
+            }
+        }
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "mean": round(statistics.fmean(values), 2)
+    }
+
+def silent_wav(seconds: float, rate: int = 16000) -> bytes:
+    """A mono 16-bit WAV of silence, standing in for a recorded answer"""
+    frames = int(seconds * rate)
+    data = bytes(frames * 2)
+    header = b"RIFF" + struct.pack("<I", 36 + len(data)) + b"WAVEfmt " + struct.pack(
+        "<IHHIIHH", 16, 1, 1, rate, rate * 2, 2, 16
+    ) + b"data" + struct.pack("<I", len(data))
+    return header + data
+
+class Candidate:
+    def __init__(self, index: int, args, client: httpx.AsyncClient, stats: LoadStats):
+        self.user_id = f"load-{uuid.uuid4().hex[:8]}-{index}"
+        self.email = f"{self.user_id}@loadtest.local"
+        self.args = args
+        self.client = client
+        self.stats = stats
+        self.token: Optional[str] = None
+        self.audio = silent_wav(args.answer_seconds)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def step(self, stage: str, coro):
+        """Run one stage, recording its latency or its failure"""
+        self.stats.attempts[stage] += 1
+        started = time.perf_counter()
+        try:
+            result = await coro
+            self.stats.record(stage, started)
+            return result
+        except Exception:
+            self.stats.errors[stage] += 1
+            raise
+
+    async def post(self, path: str, **kwargs) -> Dict:
+        response = await self.client.post(path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def run(self):
+        try:
+            tokens = await self.step("generate_token", self.post(
+                "/generate-token", json={"user_id": self.user_id, "email": self.email}
+            ))
+            self.token = tokens["token"]["access_token"]
+            await self.step("process_documents", self.post(
+                "/process-documents", headers=self.headers,
+                json={"resume": RESUME, "job_description": JOB_DESCRIPTION}
+            ))
+            await self.step("queue_wait", self.wait_for_slot())
+            await self.interview()
+        except Exception:
+            pass
+        finally:
+            if self.token:
+                try:
+                    await self.step("leave_interview", self.post("/leave-interview", headers=self.headers))
+                except Exception:
+                    pass
+
+    async def wait_for_slot(self):
+        joined = await self.post("/join-interview-queue", headers=self.headers)
+        if joined["status"] == "active":
+            return
+        while True:
+            await asyncio.sleep(self.args.queue_poll)
+            response = await self.client.get("/queue-status", headers=self.headers)
+            response.raise_for_status()
+            # Promotion removes the user from the queue and marks them active
+            if response.json()["queue_position"] == -1:
+                return
+
+    def interview_url(self) -> str:
+        ws_url = self.args.base_url.replace("http", "ws", 1)
+        return (
+            f"{ws_url}/ws/interview?token={self.token}&user_id={self.user_id}&new_session=true"
+            f"&audio_formats={self.args.audio_formats}"
+        )
+
+    async def interview(self):
+        url = self.interview_url()
+        self.stats.attempts["websocket"] += 1
+        try:
+            async with websockets.connect(url, max_size=None) as ws:
+                await self.interviewer_turn(ws, time.perf_counter())
+                for _ in range(self.args.turns):
+                    await asyncio.sleep(self.args.think_time)
+                    text = await self.step("transcribe", self.transcribe())
+                    started = time.perf_counter()
+                    await ws.send(text or "I would start by measuring where the time goes.")
+                    await self.interviewer_turn(ws, started)
+        except Exception:
+            self.stats.errors["websocket"] += 1
+            raise
+
+    async def transcribe(self) -> str:
+        files = {"audio": ("answer.wav", io.BytesIO(self.audio), "audio/wav")}
+        result = await self.post("/transcribe", headers=self.headers, files=files)
+        return result["text"]
+
+    async def interviewer_turn(self, ws, started: float):
+        """Consume one interviewer turn, timing the first sentence and the gaps between sentences"""
+        self.stats.attempts["turn"] += 1
+        interviewer_speaking = False
+        last_sentence: Optional[float] = None
+        try:
+            while True:
+                frame = json.loads(await asyncio.wait_for(ws.recv(), self.args.turn_timeout))
+                if frame["type"] == "speaker_change" and frame["speaker"] == "interviewer":
+                    interviewer_speaking = True
+                elif frame["type"] == "audio_format":
+                    self.stats.audio_formats[frame["format"]] += 1
+                elif frame["type"] == "sentence":
+                    # Spooled frames give the size; inline audio is base64, four characters per three bytes
+                    self.stats.sentence_bytes.append(frame.get("audio_bytes") or len(frame.get("audio") or "") * 3 / 4)
+                    now = time.perf_counter()
+                    if last_sentence is None:
+                        self.stats.record("time_to_first_sentence", started)
+                    else:
+                        self.stats.samples["sentence_gap"].append((now - last_sentence) * 1000)
+                    last_sentence = now
+                    if "seq" in frame:
+                        await ws.send(json.dumps({"type": "ack", "seq": frame["seq"]}))
+                elif frame["type"] == "speaker_change" and frame.get("showPrompt") and interviewer_speaking:
+                    # Earlier showPrompt frames belong to the previous turn
+                    self.stats.record("turn_duration", started)
+                    return
+                elif frame["type"] == "system":
+                    raise RuntimeError(frame.get("content"))
+        except Exception:
+            self.stats.errors["turn"] += 1
+            raise
+
+async def run_load(args) -> Dict:
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.http_timeout, limits=limits) as client:
+        started = time.perf_counter()
+        tasks = []
+        for index in range(args.users):
+            tasks.append(asyncio.create_task(Candidate(index, args, client, stats).run()))
+            await asyncio.sleep(args.ramp / max(1, args.users))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    report = stats.report()
+    report["config"] = {
+        "users": args.users,
+        "turns": args.turns,
+        "ramp_seconds": args.ramp,
+        "base_url": args.base_url
+    }
+    report["elapsed_seconds"] = round(elapsed, 2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent candidates against the interview backend")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10, help="number of simulated candidates")
+    parser.add_argument("--turns", type=int, default=3, help="candidate answers per interview")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which candidates arrive")
+    parser.add_argument("--think-time", type=float, default=1.0, help="seconds between interviewer turn and answer")
+    parser.add_argument("--answer-seconds", type=float, default=5.0, help="length of the uploaded answer audio")
+    parser.add_argument("--queue-poll", type=float, default=1.0, help="seconds between queue status polls")
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("--http-timeout", type=float, default=120.0)
+    parser.add_argument("--audio-formats", default="opus,aac,mp3", help="formats offered on connect, best first")
+    parser.add_argument("--output", help="optional path to write the JSON report to")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, Optional
+
+from metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+# How often the loop is probed, and how late a probe must be to count as a blocking call
+LOOP_MONITOR_INTERVAL = float(os.getenv('LOOP_MONITOR_INTERVAL', 0.05))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv('LOOP_BLOCK_THRESHOLD_MS', 100))
+LOOP_MONITOR_MAX_SITES = int(os.getenv('LOOP_MONITOR_MAX_SITES', 50))
+
+MONITOR_FILE = os.path.abspath(__file__)
+BACKEND_DIR = os.path.dirname(MONITOR_FILE)
+
+class EventLoopMonitor:
+    """
+    Measures event-loop scheduling lag and attributes stalls to the code that caused them.
+
+    A probe task sleeps for a fixed interval and records how late it wakes up.
+    A watchdog thread notices when the probe is overdue, captures the loop
+    thread's stack while the blocking call is still running, and the probe
+    charges the full stall to that call site once the loop resumes.
+    """
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.recent_lag_ms = deque(maxlen=1200)
+        self.sites: Dict[str, Dict[str, Any]] = {}
+        self._heartbeat = time.monotonic()
+        self._captured: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start probing the running loop; call from inside it"""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _probe(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            self.recent_lag_ms.append(lag * 1000)
+            with self._lock:
+                captured, self._captured = self._captured, None
+            if lag * 1000 >= self.threshold_ms:
+                self._record_block(captured or {"site": "unknown", "stack": ""}, lag * 1000)
+
+    def _watch(self):
+        # Poll a few times per threshold so the stack is caught while the call is still blocking
+        poll = self.threshold_ms / 1000 / 4
+        captured_for = None
+        while not self._stop.wait(poll):
+            heartbeat = self._heartbeat
+            overdue_ms = (time.monotonic() - heartbeat - self.interval) * 1000
+            if overdue_ms < self.threshold_ms or captured_for == heartbeat:
+                continue
+            captured_for = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                with self._lock:
+                    self._captured = _describe(frame)
+
+    def _record_block(self, captured: Dict[str, str], blocked_ms: float):
+        site = captured["site"]
+        logger.warning(f"Event loop blocked for {blocked_ms:.0f}ms at {site}")
+        entry = self.sites.get(site)
+        # Bounded so a noisy stall cannot grow the report or the metric's label set without limit
+        if entry is None and len(self.sites) >= LOOP_MONITOR_MAX_SITES:
+            EVENT_LOOP_BLOCKS.labels(site="other").inc()
+            return
+        EVENT_LOOP_BLOCKS.labels(site=site).inc()
+        if entry is None:
+            entry = self.sites[site] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": ""}
+        entry["count"] += 1
+        entry["total_ms"] += blocked_ms
+        if blocked_ms >= entry["max_ms"]:
+            entry["max_ms"] = blocked_ms
+            entry["stack"] = captured["stack"]
+
+    def report(self, limit: int = 10) -> Dict[str, Any]:
+        """Lag percentiles over recent probes plus the call sites that blocked the loop the longest"""
+        lags = sorted(self.recent_lag_ms)
+
+        def pct(p: float) -> float:
+            return round(lags[min(len(lags) - 1, int(p / 100 * len(lags)))], 2) if lags else 0.0
+
+        offenders = sorted(self.sites.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:limit]
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold_ms,
+            "lag_ms": {"p50": pct(50), "p99": pct(99), "max": pct(100), "samples": len(lags)},
+            "worst_offenders": [
+                {
+                    "site": site,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 1),
+                    "max_ms": round(entry["max_ms"], 1),
+                    "stack": entry["stack"]
+                }
+                for site, entry in offenders
+            ]
+        }
+
+def _describe(frame) -> Dict[str, str]:
+    """Name the innermost backend frame as the call site; library frames above it are the blocking call"""
+    stack = traceback.extract_stack(frame)
+    site = stack[-1]
+    for entry in reversed(stack):
+        if entry.filename.startswith(BACKEND_DIR) and entry.filename != MONITOR_FILE:
+            site = entry
+            break
+    return {
+        "site": f"{os.path.basename(site.filename)}:{site.lineno} in {site.name}",
+        "stack": "".join(traceback.format_list(stack[-15:]))
+    }
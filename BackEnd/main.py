@@ -1,28 +1,50 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends, Header, File, UploadFile, Query, status
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException, Depends, Header, File, UploadFile, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, Dict, Any, List
+from fastapi.responses import Response
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 import os
 from datetime import datetime
-import json
+import time
 import asyncio
 from openai import AsyncOpenAI
 import tempfile
 from pydantic import BaseModel
-import redis
-import jwt
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import base64
+import hmac
 import re
+import uuid
 from starlette.websockets import WebSocketState
+from contextlib import asynccontextmanager
 
 # Import local services
 from redis_service import RedisService
+from document_processor import DocumentProcessor
 from prompt_generator import PromptGenerator
 from text_to_speech import TextToSpeech
 from token_manager import TokenManager
-from redis_config import redis_client
 from speech_to_text import SpeechToText
+from metrics import (
+    ACTIVE_CONNECTIONS, ADMISSION_LIMIT_ADJUSTMENTS, ADMISSION_SLOTS_IN_USE, ADMISSION_SLOTS_LIMIT,
+    ADMISSION_WINDOW_ERROR_RATE, ADMISSION_WINDOW_SLOW_RATE, LLM_ROUTED_TURNS, LLM_STREAM_DURATION,
+    LLM_TIME_TO_FIRST_TOKEN, LLM_TIER_TIME_TO_FIRST_TOKEN, QUEUE_LENGTH, STT_DURATION, TIME_TO_FIRST_AUDIO, TTS_CHUNKS_PER_TURN, TTS_DURATION,
+    render_metrics
+)
+import executors
+from admission_limit import ADMISSION_WINDOW_SECONDS
+from audio_formats import mime_type, negotiate
+from audio_spool import AUDIO_SPOOL, AUDIO_SPOOL_TTL, AUDIO_SPOOL_URL, AudioSpool, MisroutedAudio, parse_range
+import fast_json
+from document_compactor import estimate_tokens
+from loop_monitor import EventLoopMonitor
+from model_router import route_turn
+from rate_limiter import RateLimiter, is_rate_limited
+from retrieval_index import SnippetIndex
+from send_queue import SendQueue
+from sentence_chunker import SentenceChunker, choose_policy
+from session_recorder import RECORD_TRACE_DIR, expire_recordings, finish_recording, get_recorder, start_recording
+from tracing import begin_span, extract_context, fail_span, setup_tracing, start_span, tag_current_span, tag_spans, use_span
+from upstream_http import UpstreamHTTP, OPENAI_BASE_URL, DEEPSEEK_BASE_URL, ANTHROPIC_BASE_URL, LLM_TIMEOUT
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -37,14 +59,103 @@ secret_key = os.getenv("SECRET_KEY")
 if not secret_key:
     raise ValueError("SECRET_KEY environment variable is not set")
 
-# Initialize RedisService
-redis_service = RedisService()
-
 # Add security scheme
 security = HTTPBearer()
 
+# /debug endpoints expose task stacks and internals; they answer only to this token, sent as X-Debug-Token
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")
+
+# Services are built in the lifespan so importing this module stays cheap
+redis_service: Optional[RedisService] = None
+upstream: Optional[UpstreamHTTP] = None
+openai_client: Optional[AsyncOpenAI] = None
+tts_service: Optional[TextToSpeech] = None
+stt_service: Optional[SpeechToText] = None
+prompt_service: Optional[PromptGenerator] = None
+rate_limiter: Optional[RateLimiter] = None
+mongodb = None
+loop_monitor: Optional[EventLoopMonitor] = None
+document_processor = DocumentProcessor()
+audio_spool = AudioSpool(secret_key)
+
+async def warmup_connections():
+    """Open pooled connections in the background so the first requests don't pay for them"""
+    await upstream.warmup([OPENAI_BASE_URL, DEEPSEEK_BASE_URL, ANTHROPIC_BASE_URL])
+    try:
+        await asyncio.to_thread(redis_service.client.ping)
+        logger.info("Redis connection pool warmed up")
+    except Exception as e:
+        logger.error(f"Redis warmup failed: {e}")
+    if mongodb:
+        try:
+            await mongodb.connect()
+        except Exception as e:
+            logger.error(f"MongoDB warmup failed: {e}")
+
+async def adjust_admission_limit():
+    """Re-evaluate the shared admission limit once per window and fill any slots a raise opens"""
+    while True:
+        await asyncio.sleep(ADMISSION_WINDOW_SECONDS)
+        try:
+            entry = await asyncio.to_thread(redis_service.adjust_admission_limit)
+            if not entry:
+                continue  # Another worker already handled this window
+            ADMISSION_LIMIT_ADJUSTMENTS.labels(reason=entry["reason"]).inc()
+            ADMISSION_SLOTS_LIMIT.set(entry["limit"])
+            if entry["turns"]:
+                ADMISSION_WINDOW_ERROR_RATE.set(entry["errors"] / entry["turns"])
+                ADMISSION_WINDOW_SLOW_RATE.set(entry["slow"] / entry["turns"])
+            if entry["limit"] != entry["previous"]:
+                logger.info(f"Admission limit {entry['previous']} -> {entry['limit']} ({entry['reason']})")
+            if entry["limit"] > entry["previous"]:
+                promoted = await asyncio.to_thread(redis_service.check_and_promote_users)
+                if promoted:
+                    logger.info(f"Promoted {len(promoted)} queued users after raising the admission limit")
+        except Exception as e:
+            logger.error(f"Admission limit adjustment failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global redis_service, upstream, openai_client, tts_service, stt_service, prompt_service, rate_limiter, mongodb, loop_monitor
+    setup_tracing()
+    loop_monitor = EventLoopMonitor()
+    loop_monitor.start()
+    # Construction only; no network I/O happens until warmup or the first request
+    redis_service = RedisService()
+    # One set of provider rate limits shared by every worker through Redis
+    rate_limiter = RateLimiter(redis_service.client)
+    # All provider clients share one pooled transport
+    upstream = UpstreamHTTP()
+    openai_client = AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=OPENAI_BASE_URL,
+        http_client=upstream.client
+    )
+    tts_service = TextToSpeech(openai_client, limiter=rate_limiter)
+    stt_service = SpeechToText(openai_client, limiter=rate_limiter)
+    prompt_service = PromptGenerator(upstream.client, rate_limiter)
+    try:
+        from mongodb_utils import MongoDB
+        mongodb = MongoDB()
+        mongodb.writer.start()
+    except Exception as e:
+        logger.error(f"Conversation persistence disabled: {e}")
+
+    # An unreachable dependency must not stop the worker from starting
+    warmup_task = asyncio.create_task(warmup_connections())
+    admission_task = asyncio.create_task(adjust_admission_limit())
+    yield
+    warmup_task.cancel()
+    admission_task.cancel()
+    if mongodb:
+        await mongodb.writer.stop()
+    await upstream.aclose()
+    await loop_monitor.stop()
+    executors.shutdown()
+    audio_spool.close()
+
 # Initialize FastAPI app with security scheme
-app = FastAPI(security=[security])
+app = FastAPI(security=[security], lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -56,10 +167,19 @@ app.add_middleware(
 )
 
 # Initialize services
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 token_manager = TokenManager(secret_key)
-tts_service = TextToSpeech(openai_client)
-prompt_service = PromptGenerator()
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """One span per HTTP request, continuing any trace context sent by the client"""
+    with start_span(
+        f"HTTP {request.method} {request.url.path}",
+        context=extract_context(dict(request.headers)),
+        **{"http.method": request.method, "http.route": request.url.path}
+    ) as span:
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+        return response
 
 # Models
 class User(BaseModel):
@@ -88,6 +208,7 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
                 status_code=401, 
                 detail="Invalid or expired token"
             )
+        tag_current_span(**{"user.id": payload.get("user_id")})
         return payload
     except Exception as e:
         logger.error(f"Token verification failed: {e}")
@@ -120,21 +241,26 @@ async def process_documents(
         email = current_user["email"]
 
         # Clear any existing interview data for this user
-        redis_service.clear_interview_data(user_id)
-
-        # Generate interview prompt
-        prompt = await prompt_service.generate_interview_prompt(
-            resume=request.resume,
-            job_description=request.job_description
+        await asyncio.to_thread(redis_service.clear_interview_data, user_id)
+
+        # The prompt only carries summaries; the full documents are indexed so turns can cite specifics
+        index, prompt = await asyncio.gather(
+            executors.run_in_thread("build_index", SnippetIndex.build, request.resume, request.job_description),
+            prompt_service.generate_interview_prompt(
+                resume=request.resume,
+                job_description=request.job_description
+            )
         )
+        await asyncio.to_thread(redis_service.store_retrieval_index, user_id, index.to_dict())
         
         # Store in Redis
         interview_id = f"interview:{user_id}"
-        redis_service.store_interview_prompt(user_id, {
+        await asyncio.to_thread(redis_service.store_interview_prompt, user_id, {
             'prompt': prompt,
             'created_at': datetime.utcnow().isoformat(),
             'questions_asked': []  # Initialize empty questions list
         })
+        await asyncio.to_thread(redis_service.init_interview_context, user_id, prompt, uuid.uuid4().hex)
         
         return {
             "user_id": user_id,
@@ -149,45 +275,145 @@ async def process_documents(
             detail=str(e)
         )
 
+@app.post("/upload-documents", response_model=Dict[str, Any])
+async def upload_documents(
+    file: UploadFile = File(...),
+    current_user: Dict[str, Any] = Depends(verify_token)
+):
+    """Extract text from an uploaded resume or job description (PDF, DOCX or plain text)"""
+    try:
+        content = await file.read()
+        with start_span("document.extract", **{"document.bytes": len(content)}):
+            result = await document_processor.extract(content)
+        logger.info(
+            f"Extracted {len(result['text'])} characters from {result['content_type']} upload "
+            f"for user {current_user['user_id']} (cached: {result['cached']})"
+        )
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting document: {e}")
+        raise HTTPException(status_code=500, detail="Failed to process document")
+
+class SentenceOutbox:
+    """
+    Sentence frames sent to a client, kept until acknowledged so they can be replayed on reconnect.
+    Outboxes live in the worker's memory, so reconnects must reach the same worker (sticky sessions).
+    """
+    MAX_FRAMES = 50
+
+    def __init__(self, start_seq: int = 0):
+        # A client that reconnects to a worker without its outbox keeps counting from where it was
+        self.last_seq = start_seq
+        self.frames: Dict[int, Dict[str, Any]] = {}
+        self.last_active = time.monotonic()
+
+    def add(self, frame: Dict[str, Any]) -> Dict[str, Any]:
+        self.last_active = time.monotonic()
+        self.last_seq += 1
+        frame["seq"] = self.last_seq
+        self.frames[self.last_seq] = frame
+        # Bound memory per user; the oldest frames are the least likely to be replayed
+        while len(self.frames) > self.MAX_FRAMES:
+            del self.frames[next(iter(self.frames))]
+        return frame
+
+    def ack(self, seq: int):
+        self.last_active = time.monotonic()
+        for acked in [s for s in self.frames if s <= seq]:
+            del self.frames[acked]
+
+    def pending(self, after_seq: int) -> List[Dict[str, Any]]:
+        return [frame for s, frame in self.frames.items() if s > after_seq]
+
 class UserConnection:
-    def __init__(self, websocket: WebSocket):
+    def __init__(self, websocket: WebSocket, outbox: SentenceOutbox):
         self.websocket = websocket
+        self.outbox = outbox
+        self.sender = SendQueue(websocket)
         self.lock = asyncio.Lock()
-        self.current_sentence = ""
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, UserConnection] = {}
+        # Outboxes outlive connections so a reconnecting client can be caught up
+        self.outboxes: Dict[str, SentenceOutbox] = {}
 
-    async def connect(self, user_id: str, websocket: WebSocket) -> bool:
+    async def connect(self, user_id: str, websocket: WebSocket, reset_outbox: bool = False, last_seq: int = 0) -> bool:
         try:
             await websocket.accept()
-            self.active_connections[user_id] = UserConnection(websocket)
+            self.expire_outboxes()
+            if reset_outbox:
+                self.outboxes[user_id] = SentenceOutbox()
+            elif user_id not in self.outboxes:
+                if last_seq:
+                    logger.warning(
+                        f"No outbox for user {user_id} on this worker; frames after seq {last_seq} cannot be replayed. "
+                        f"Reconnects need sticky sessions."
+                    )
+                self.outboxes[user_id] = SentenceOutbox(start_seq=last_seq)
+            self.outboxes[user_id].last_active = time.monotonic()
+            replaced = self.active_connections.get(user_id)
+            if replaced:
+                replaced.sender.stop()
+            conn = self.active_connections[user_id] = UserConnection(websocket, self.outboxes[user_id])
+            conn.sender.start()
+            ACTIVE_CONNECTIONS.set(len(self.active_connections))
             return True
         except Exception as e:
             logger.error(f"Failed to connect user {user_id}: {e}")
             return False
 
-    async def disconnect(self, user_id: str):
-        if user_id in self.active_connections:
+    async def disconnect(self, user_id: str, websocket: Optional[WebSocket] = None):
+        conn = self.active_connections.get(user_id)
+        # A reconnect may already have replaced this socket; leave the new one alone
+        if conn and websocket is not None and conn.websocket is not websocket:
             try:
-                await self.active_connections[user_id].websocket.close()
+                await websocket.close()
+            except:
+                pass
+            return
+        if conn:
+            conn.sender.stop()
+            try:
+                await conn.websocket.close()
             except:
                 pass
             del self.active_connections[user_id]
+            ACTIVE_CONNECTIONS.set(len(self.active_connections))
 
     def get_connection(self, user_id: str) -> Optional[UserConnection]:
         return self.active_connections.get(user_id)
 
+    def drop_outbox(self, user_id: str):
+        self.outboxes.pop(user_id, None)
+
+    def expire_outboxes(self):
+        """Drop outboxes of abandoned sessions; past the spool TTL their audio could not be replayed anyway"""
+        cutoff = time.monotonic() - AUDIO_SPOOL_TTL
+        for user_id in [u for u, box in self.outboxes.items() if box.last_active < cutoff and u not in self.active_connections]:
+            del self.outboxes[user_id]
+
 manager = ConnectionManager()
 
 class InterviewSession:
-    def __init__(self, user_id: str, prompt: str):
+    def __init__(self, user_id: str, prompt: str, interview_id: Optional[str] = None, email: str = ""):
         self.user_id = user_id
         self.prompt = prompt
+        self.interview_id = interview_id or f"interview:{user_id}"
+        self.email = email
+        self.message_count = 0  # Messages persisted so far; positions the next transcript append
+        self.turn_count = 0
+        self.recorder = None  # SessionRecorder when RECORD_TRACE_DIR is set
+        self.index: Optional[SnippetIndex] = None
         self.messages = []
         self.has_started = False
+        self.questions_asked: List[str] = []
         self.last_interaction = datetime.utcnow()
+        self.deadline: Optional[float] = None  # Monotonic time the interview timer runs out
+        self.audio_format = "mp3"  # Negotiated with the client on each connection
+        self.audio_bitrate = 0
         self.inactivity_timeout = 360  # 6 minutes in seconds (changed from 300)
 
     def add_message(self, role: str, content: str):
@@ -198,20 +424,138 @@ class InterviewSession:
         elapsed = (datetime.utcnow() - self.last_interaction).total_seconds()
         return elapsed > self.inactivity_timeout
 
+    def remaining_seconds(self) -> Optional[float]:
+        return self.deadline - time.monotonic() if self.deadline is not None else None
+
     def get_context(self) -> List[Dict[str, str]]:
         return [{"role": "system", "content": self.prompt}] + self.messages
 
+    @classmethod
+    def from_snapshot(cls, user_id: str, snapshot: Dict[str, Any], email: str = "") -> "InterviewSession":
+        """Rebuild a session from the state persisted in Redis"""
+        session = cls(user_id, snapshot["prompt_data"]["prompt"], snapshot["interview_id"], email)
+        roles = {"interviewer": "assistant", "candidate": "user"}
+        session.messages = [
+            {"role": roles.get(m["role"], m["role"]), "content": m["content"]}
+            for m in snapshot["conversation_history"]
+        ]
+        session.questions_asked = snapshot["questions_asked"]
+        session.message_count = snapshot["message_count"]
+        session.has_started = any(m["role"] == "assistant" for m in session.messages)
+        session.load_index(snapshot)
+        return session
+
+    def load_index(self, snapshot: Dict[str, Any]):
+        if snapshot.get("retrieval_index"):
+            try:
+                self.index = SnippetIndex.from_dict(snapshot["retrieval_index"])
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable retrieval index for user {self.user_id}: {e}")
+
+    def relevant_snippets(self) -> str:
+        """Resume and job description passages matching the candidate's latest answer"""
+        answer = next((m["content"] for m in reversed(self.messages) if m["role"] == "user"), "")
+        if not self.index or not answer:
+            return ""
+        labels = {"resume": "Resume", "job_description": "Job description"}
+        return "\n".join(f"- {labels[source]}: {text}" for source, text in self.index.search(answer))
+
+async def record_message(session: InterviewSession, role: str, content: str):
+    """Persist one message to the Redis history and append it to the transcript; never waits on the database"""
+    message = {"role": role, "content": content}
+    # Redis holds the count a resumed session continues from, so transcript positions follow it
+    stored_count = await asyncio.to_thread(redis_service.update_conversation_history, session.user_id, message)
+    if stored_count is None:
+        logger.warning(f"Message not stored for user {session.user_id}; leaving it out of the transcript")
+        return
+    if mongodb:
+        mongodb.append_message(session.interview_id, stored_count - 1, message, session.email, session.user_id)
+    session.message_count = stored_count
+
+async def record_turn_outcome(latency_seconds: Optional[float], error: bool = False):
+    """Count a turn towards the admission window off the event loop; a Redis failure here never affects the turn"""
+    try:
+        await asyncio.to_thread(redis_service.record_turn_outcome, latency_seconds, error)
+    except Exception as e:
+        logger.warning(f"Failed to record turn outcome: {e}")
+
+def complete_transcript(session: InterviewSession):
+    """Mark a finished interview's transcript as complete"""
+    if mongodb and session.message_count:
+        mongodb.complete_interview(session.interview_id)
+
+def sentence_frame(sentence: str, audio_data: bytes, audio_ref: Optional[str] = None, audio_format: str = "mp3") -> Dict[str, Any]:
+    """
+    WebSocket payload for one spoken sentence. Spooled audio is referenced by URL;
+    otherwise the audio is inline and base64-encoded when the frame is sent.
+    """
+    if audio_ref:
+        return {
+            "type": "sentence",
+            "text": sentence,
+            "audio_url": f"{AUDIO_SPOOL_URL}/audio/{audio_ref}",
+            "audio_bytes": len(audio_data),
+            "audio_mime": mime_type(audio_format)
+        }
+    return {
+        "type": "sentence",
+        "text": sentence,
+        "audio": audio_data,
+        "audio_mime": mime_type(audio_format)
+    }
+
+def parse_client_frame(message: str) -> Dict[str, Any]:
+    """Decode a client frame: an ack, or a candidate answer (JSON with trace context, or plain text)"""
+    if message.startswith("{"):
+        try:
+            data = fast_json.loads(message)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and data.get("type") in ("ack", "answer"):
+            return data
+    return {"type": "answer", "text": message}
+
 @app.websocket("/ws/interview")
 async def interview_websocket(
     websocket: WebSocket,
     token: str,
     user_id: str,
-    new_session: bool = False
+    new_session: bool = False,
+    last_seq: int = 0,
+    traceparent: Optional[str] = None,
+    audio_formats: Optional[str] = None,
+    audio_bitrate: int = 0
 ):
+    async def emit_sentence(sentence: str, user_conn: UserConnection, session: InterviewSession):
+        # Hold off on synthesizing more audio while the client is still behind on what it has been sent
+        await user_conn.sender.wait_for_room()
+        tts_started = time.perf_counter()
+        with start_span("tts.sentence", **{"tts.chars": len(sentence)}), TTS_DURATION.time():
+            audio_data = await tts_service.generate_speech(sentence, session.audio_format, session.audio_bitrate)
+        if session.recorder:
+            session.recorder.record_tts(len(sentence), len(audio_data), round((time.perf_counter() - tts_started) * 1000, 1))
+
+        # Frames are sequenced and kept in the outbox until acked so they survive a reconnect
+        # Appends may roll or reclaim segment files, so they run off the event loop
+        audio_ref = await asyncio.to_thread(audio_spool.append, audio_data, session.audio_format) if AUDIO_SPOOL == "on" else None
+        frame = user_conn.outbox.add(sentence_frame(sentence, audio_data, audio_ref, session.audio_format))
+        await user_conn.sender.send(frame, "sentence")
+
+        # Track questions and update context
+        if sentence.endswith('?'):
+            await asyncio.to_thread(redis_service.add_question_asked, session.user_id, sentence)
+
+        # Update conversation history
+        await record_message(session, "interviewer", sentence)
+
+        session.add_message("assistant", sentence)
+
     async def process_gpt_response(messages, user_conn: UserConnection, session: InterviewSession):
         async with user_conn.lock:
+            turn_started = time.perf_counter()
+            first_audio_latency = None
             try:
-                await user_conn.websocket.send_json({
+                await user_conn.sender.send({
                     "type": "speaker_change",
                     "speaker": "interviewer"
                 })
@@ -245,100 +589,114 @@ IMPORTANT REMINDERS:
 - Keep responses focused and concise
 - Maintain a natural conversational flow
 - Ask broad, open-ended questions more often than follow-ups
+"""
+                    snippets = session.relevant_snippets()
+                    if snippets:
+                        system_content += f"""
+Details from the candidate's documents related to their last answer (reference them only when useful):
+{snippets}
 """
                     messages = [{"role": "system", "content": system_content}] + messages[-5:]
 
-                stream = await openai_client.chat.completions.create(
-                    model="gpt-4",
-                    messages=messages,
-                    stream=True,
-                    max_tokens=300,
-                    temperature=0.7
+                answer = next((m["content"] for m in reversed(session.messages) if m["role"] == "user"), "")
+                route = route_turn(answer, session.has_started, session.remaining_seconds())
+                LLM_ROUTED_TURNS.labels(tier=route.tier, reason=route.reason).inc()
+
+                prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+                await rate_limiter.acquire("openai:chat", prompt_tokens + route.max_tokens, session.user_id)
+
+                llm_started = time.perf_counter()
+                first_token_seen = False
+                first_token_ms = None
+                # Covers the whole stream; TTS spans are siblings under the turn, not children
+                llm_span = begin_span("llm.stream", **route.attributes())
+                try:
+                    with use_span(llm_span):
+                        stream = await openai_client.chat.completions.create(
+                            model=route.model,
+                            messages=messages,
+                            stream=True,
+                            max_tokens=route.max_tokens,
+                            temperature=0.7,
+                            timeout=LLM_TIMEOUT
+                        )
+
+                    policy = choose_policy(session.interview_id)
+                    chunker = SentenceChunker(policy)
+                    recorded_chunks = []
+                    last_chunk_at = llm_started
+
+                    async def emit_chunks(chunks: List[str]):
+                        nonlocal first_audio_latency
+                        # The chunker has already counted this batch, so a batch holding the reply's first chunk matches here
+                        first_batch = chunker.chunks_emitted == len(chunks)
+                        for index, sentence in enumerate(chunks):
+                            try:
+                                await emit_sentence(sentence, user_conn, session)
+                            except Exception as e:
+                                logger.error(f"Error sending sentence: {e}")
+                                if "close message has been sent" not in str(e):
+                                    raise
+                            if first_batch and index == 0:
+                                first_audio_latency = time.perf_counter() - turn_started
+                                TIME_TO_FIRST_AUDIO.labels(policy=policy).observe(time.perf_counter() - llm_started)
+
+                    async for chunk in stream:
+                        # Check if WebSocket is still open
+                        if user_conn.sender.closed or user_conn.websocket.client_state == WebSocketState.DISCONNECTED:
+                            logger.warning("WebSocket disconnected during processing")
+                            llm_span.set_attribute("llm.client_disconnected", True)
+                            break
+
+                        if chunk.choices[0].delta.content:
+                            if not first_token_seen:
+                                first_token_seen = True
+                                first_token_ms = (time.perf_counter() - llm_started) * 1000
+                                LLM_TIME_TO_FIRST_TOKEN.observe(first_token_ms / 1000)
+                                LLM_TIER_TIME_TO_FIRST_TOKEN.labels(tier=route.tier).observe(first_token_ms / 1000)
+                                llm_span.add_event("first_token")
+                            content = chunk.choices[0].delta.content
+                            if session.recorder:
+                                chunk_at = time.perf_counter()
+                                recorded_chunks.append([round((chunk_at - last_chunk_at) * 1000, 1), content])
+                                last_chunk_at = chunk_at
+                            await emit_chunks(chunker.feed(content))
+
+                    stream_seconds = time.perf_counter() - llm_started
+                    LLM_STREAM_DURATION.observe(stream_seconds)
+                except Exception as e:
+                    # Failed and abandoned streams are the ones the trace most needs to show
+                    fail_span(llm_span, e)
+                    raise
+                finally:
+                    llm_span.end()
+                logger.info(
+                    f"LLM route tier={route.tier} model={route.model} reason={route.reason} "
+                    f"first_token_ms={first_token_ms and round(first_token_ms)} stream_ms={round(stream_seconds * 1000)}"
                 )
-
-                user_conn.current_sentence = ""
-
-                async for chunk in stream:
-                    # Check if WebSocket is still open
-                    if user_conn.websocket.client_state == WebSocketState.DISCONNECTED:
-                        logger.warning("WebSocket disconnected during processing")
-                        break
-
-                    if chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        user_conn.current_sentence += content
-
-                        sentences = re.split(r'(?<=[.!?]) +', user_conn.current_sentence)
-                        
-                        if sentences and not sentences[-1].strip().endswith(('.', '!', '?')):
-                            user_conn.current_sentence = sentences.pop()
-                        else:
-                            user_conn.current_sentence = ""
-
-                        for sentence in sentences:
-                            sentence = sentence.strip()
-                            if sentence:
-                                try:
-                                    audio_data = await tts_service.generate_speech(sentence)
-                                    if user_conn.websocket.client_state == WebSocketState.CONNECTED:
-                                        await user_conn.websocket.send_json({
-                                            "type": "sentence",
-                                            "text": sentence,
-                                            "audio": base64.b64encode(audio_data).decode('utf-8')
-                                        })
-                                        
-                                        # Track questions and update context
-                                        if sentence.strip().endswith('?'):
-                                            redis_service.add_question_asked(session.user_id, sentence)
-                                        
-                                        # Update conversation history
-                                        redis_service.update_conversation_history(session.user_id, {
-                                            "role": "interviewer",
-                                            "content": sentence
-                                        })
-                                        
-                                        session.add_message("assistant", sentence)
-                                except Exception as e:
-                                    logger.error(f"Error sending sentence: {e}")
-                                    if "close message has been sent" not in str(e):
-                                        raise
+                if session.recorder and recorded_chunks:
+                    session.recorder.record_llm_turn(recorded_chunks[0][0], recorded_chunks, route.tier, route.model)
 
                 # Handle any remaining text
-                if user_conn.current_sentence.strip() and user_conn.websocket.client_state == WebSocketState.CONNECTED:
-                    try:
-                        sentence = user_conn.current_sentence.strip()
-                        audio_data = await tts_service.generate_speech(sentence)
-                        await user_conn.websocket.send_json({
-                            "type": "sentence",
-                            "text": sentence,
-                            "audio": base64.b64encode(audio_data).decode('utf-8')
-                        })
-                        
-                        # Track final sentence if it's a question
-                        if sentence.endswith('?'):
-                            redis_service.add_question_asked(session.user_id, sentence)
-                        
-                        # Update final conversation history
-                        redis_service.update_conversation_history(session.user_id, {
-                            "role": "interviewer",
-                            "content": sentence
-                        })
-                        
-                        session.add_message("assistant", sentence)
-                    except Exception as e:
-                        logger.error(f"Error sending final sentence: {e}")
-                        if "close message has been sent" not in str(e):
-                            raise
+                if not user_conn.sender.closed and user_conn.websocket.client_state == WebSocketState.CONNECTED:
+                    await emit_chunks(chunker.flush())
+                TTS_CHUNKS_PER_TURN.labels(policy=policy).observe(chunker.chunks_emitted)
 
                 # After all sentences are processed, indicate it's user's turn
-                await user_conn.websocket.send_json({
+                await user_conn.sender.send({
                     "type": "speaker_change",
                     "speaker": "user",
                     "showPrompt": True
                 })
 
+                # Turn latency as the candidate experiences it feeds the admission limit
+                await record_turn_outcome(first_audio_latency)
+
             except Exception as e:
                 logger.error(f"Error processing GPT response: {e}")
+                await record_turn_outcome(None, error=True)
+                if is_rate_limited(e):
+                    await rate_limiter.drain("openai:chat")
                 raise
 
     try:
@@ -349,65 +707,143 @@ IMPORTANT REMINDERS:
             return
             
         # Connect websocket
-        if not await manager.connect(user_id, websocket):
+        if not await manager.connect(user_id, websocket, reset_outbox=new_session, last_seq=last_seq):
             return
+        user_conn = manager.get_connection(user_id)
             
-        # Get interview prompt
-        prompt_data = redis_service.get_interview_prompt(user_id)
-        if not prompt_data:
+        # Prompt, conversation history, questions and timer come back in one Redis read
+        snapshot = await asyncio.to_thread(redis_service.get_session_snapshot, user_id)
+        if not snapshot:
             logger.error(f"No prompt data found for user {user_id}")
             await websocket.close(code=4002)
             return
 
-        # Initialize session
-        logger.info(f"Starting new interview for user {user_id}")
-        session = InterviewSession(user_id, prompt_data["prompt"])
-        session.messages = []  # Ensure messages are cleared
-        session.has_started = False
+        # The timer starts on the first connection and keeps running across reconnects
+        if not snapshot["timer_started"]:
+            await asyncio.to_thread(redis_service.start_interview_timer, user_id, keep_existing=True)
 
         if new_session:
+            logger.info(f"Starting new interview for user {user_id}")
+            # Every fresh start gets its own transcript
+            interview_id = uuid.uuid4().hex
+            await asyncio.to_thread(redis_service.init_interview_context, user_id, snapshot["prompt_data"]["prompt"], interview_id)
+            session = InterviewSession(user_id, snapshot["prompt_data"]["prompt"], interview_id, payload["email"])
+            session.load_index(snapshot)
+            # A timer already running from an earlier connection keeps its deadline
+            session.deadline = time.monotonic() + snapshot["remaining_seconds"]
+            session.recorder = start_recording(user_id)
+        else:
+            # Resume without an LLM call: restore history and catch the client up
+            logger.info(f"Resuming interview for user {user_id}")
+            session = InterviewSession.from_snapshot(user_id, snapshot, payload["email"])
+            session.recorder = get_recorder(user_id)
+            session.deadline = time.monotonic() + snapshot["remaining_seconds"]
+            if snapshot["remaining_seconds"] <= 0:
+                await websocket.send_json({
+                    "type": "system",
+                    "content": "Interview time is up."
+                })
+                await websocket.close(code=4004)
+                complete_transcript(session)
+                manager.drop_outbox(user_id)
+                return
+
+        # The client lists the formats it can decode, best first; a reconnect may come from a different browser
+        session.audio_format, session.audio_bitrate = negotiate(audio_formats, audio_bitrate)
+        audio_format_frame = {"type": "audio_format", "format": session.audio_format, "mime": mime_type(session.audio_format)}
+        # Only transcoded audio has a bitrate of ours; otherwise the client's request was not applied
+        if session.audio_bitrate:
+            audio_format_frame["bitrate"] = session.audio_bitrate
+        await user_conn.sender.send(audio_format_frame)
+
+        # A new session opens with the interviewer's introduction
+        needs_opening = new_session
+        if not new_session:
+            await user_conn.sender.send({
+                "type": "session_resumed",
+                "remaining_seconds": snapshot["remaining_seconds"],
+                "last_seq": user_conn.outbox.last_seq
+            })
+            # Replayed audio goes through the send queue, so a large catch-up is paced by the client
+            pending = user_conn.outbox.pending(last_seq)
+            for frame in pending:
+                await user_conn.sender.send(frame, "sentence")
+            # The connection dropped before the introduction produced a sentence, so it starts over
+            needs_opening = not session.has_started and not pending
+            if needs_opening:
+                logger.info(f"Restarting the opening turn for user {user_id}")
+            elif session.has_started:
+                await user_conn.sender.send({
+                    "type": "speaker_change",
+                    "speaker": "user",
+                    "showPrompt": True
+                })
+
+        if needs_opening:
             # Add initial system message to trigger proper introduction
             session.add_message("user", "[SYSTEM MESSAGE] Start the interview by introducing yourself briefly and ask the first question")
-            await process_gpt_response(session.get_context(), manager.get_connection(user_id), session)
+            turn_context = extract_context({"traceparent": traceparent}) if traceparent else None
+            with tag_spans(**{"user.id": user_id, "turn.id": f"{session.interview_id}:0"}), \
+                    start_span("interview.turn", context=turn_context):
+                await process_gpt_response(session.get_context(), user_conn, session)
             session.has_started = True
 
         # Start inactivity checker task
         async def check_inactivity():
+            nonlocal interview_complete
             while True:
                 await asyncio.sleep(30)  # Check every 30 seconds
                 if session.is_inactive():
                     logger.info(f"Session inactive for user {user_id}, closing connection")
-                    await websocket.send_json({
+                    await user_conn.sender.send({
                         "type": "system",
                         "content": "Interview ended due to inactivity. Please refresh to start a new session."
                     })
+                    await user_conn.sender.drain()
                     await websocket.close(code=4003)
+                    interview_complete = True
                     break
 
+        interview_complete = False
         inactivity_task = asyncio.create_task(check_inactivity())
 
         # Handle ongoing conversation
         while True:
             try:
-                message = await websocket.receive_text()
+                frame = parse_client_frame(await websocket.receive_text())
+                if frame["type"] == "ack":
+                    user_conn.outbox.ack(int(frame.get("seq", 0)))
+                    continue
+                message = frame.get("text", "")
                 if message.strip():
                     # Send message that user is now speaking
-                    await websocket.send_json({
+                    await user_conn.sender.send({
                         "type": "speaker_change",
                         "speaker": "user"
                     })
                     
                     session.add_message("user", message)
-                    await process_gpt_response(session.get_context(), manager.get_connection(user_id), session)
+                    await record_message(session, "candidate", message)
+                    if session.recorder:
+                        session.recorder.record_answer(message)
+                    # The client sends the trace context it used for /transcribe so the turn joins that trace
+                    session.turn_count += 1
+                    turn_context = extract_context({"traceparent": frame["traceparent"]}) if frame.get("traceparent") else None
+                    with tag_spans(**{"user.id": user_id, "turn.id": f"{session.interview_id}:{session.turn_count}"}), \
+                            start_span("interview.turn", context=turn_context):
+                        await process_gpt_response(session.get_context(), user_conn, session)
                     
                     # After GPT response is complete, send message that it's user's turn
-                    await websocket.send_json({
+                    await user_conn.sender.send({
                         "type": "speaker_change",
                         "speaker": "user",
                         "showPrompt": True  # Indicate to show the space/enter prompt
                     })
-            except WebSocketDisconnect:
+            except WebSocketDisconnect as e:
                 logger.info(f"WebSocket disconnected for user {user_id}")
+                # A normal closure ends the interview; anything else may still be resumed
+                if e.code == 1000 or not await asyncio.to_thread(redis_service.check_interview_time, user_id):
+                    interview_complete = True
                 break
             except Exception as e:
                 logger.error(f"Error processing message: {e}")
@@ -419,7 +855,14 @@ IMPORTANT REMINDERS:
         # Clean up
         if 'inactivity_task' in locals():
             inactivity_task.cancel()
-        await manager.disconnect(user_id)
+            if interview_complete:
+                complete_transcript(session)
+                finish_recording(user_id)
+                # A finished interview will not be resumed, so its unacked frames are no longer needed
+                manager.drop_outbox(user_id)
+        await manager.disconnect(user_id, websocket)
+        # Other users' sessions that were abandoned without a clean close are saved and dropped here
+        expire_recordings()
 
 @app.delete("/clear-interview/{user_id}")
 async def clear_interview(user_id: str, token_data: Dict[str, Any] = Depends(verify_token)):
@@ -427,26 +870,31 @@ async def clear_interview(user_id: str, token_data: Dict[str, Any] = Depends(ver
     if token_data["user_id"] != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    if await redis_service.clear_interview_data(user_id):
+    manager.drop_outbox(user_id)
+    if await asyncio.to_thread(redis_service.clear_interview_data, user_id):
         return {"status": "success", "message": "Interview data cleared"}
     raise HTTPException(status_code=500, detail="Failed to clear interview data")
 
 @app.post("/transcribe")
-async def transcribe_audio(audio: UploadFile = File(...)):
+async def transcribe_audio(audio: UploadFile = File(...), authorization: Optional[str] = Header(None)):
     """Handle audio transcription requests."""
     try:
         # Read the audio file
         contents = await audio.read()
         
-        # Initialize transcriber with the OpenAI client
-        transcriber = SpeechToText(openai_client)
-        
         # Transcribe with interview context
-        text = await transcriber.transcribe(
-            contents,
-            prompt="This is an interview conversation response.",
-            language="en"
-        )
+        stt_started = time.perf_counter()
+        with start_span("stt.transcribe", **{"audio.bytes": len(contents)}), STT_DURATION.time():
+            text = await stt_service.transcribe(
+                contents,
+                prompt="This is an interview conversation response.",
+                language="en"
+            )
+
+        # The endpoint does not require auth, so only sessions that send a token are recorded
+        recorder = get_recorder(transcribing_user_id(authorization))
+        if recorder:
+            recorder.record_stt(len(contents), round((time.perf_counter() - stt_started) * 1000, 1), text)
         
         if text:
             return {"text": text}
@@ -457,6 +905,13 @@ async def transcribe_audio(audio: UploadFile = File(...)):
         logger.error(f"Error transcribing audio: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def transcribing_user_id(authorization: Optional[str]) -> Optional[str]:
+    """User id from an optional Bearer header; only needed while recording session traces"""
+    if not authorization or not authorization.startswith("Bearer ") or not RECORD_TRACE_DIR:
+        return None
+    payload = token_manager.verify_token(authorization[len("Bearer "):])
+    return payload.get("user_id") if payload else None
+
 # Authentication function
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """
@@ -472,6 +927,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        tag_current_span(**{"user.id": payload.get("user_id")})
         user = User(
             id=payload.get('user_id'),
             email=payload.get('email'),
@@ -490,7 +946,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 async def start_interview(current_user: User = Depends(get_current_user)):
     try:
         # Start the interview timer
-        redis_service.start_interview_timer(current_user.id)
+        await asyncio.to_thread(redis_service.start_interview_timer, current_user.id)
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -498,7 +954,7 @@ async def start_interview(current_user: User = Depends(get_current_user)):
 @app.get("/check-interview-time")
 async def check_interview_time(current_user: User = Depends(get_current_user)):
     try:
-        should_continue = redis_service.check_interview_time(current_user.id)
+        should_continue = await asyncio.to_thread(redis_service.check_interview_time, current_user.id)
         return {"should_continue": should_continue}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -506,15 +962,84 @@ async def check_interview_time(current_user: User = Depends(get_current_user)):
 @app.post("/end-interview")
 async def end_interview(current_user: User = Depends(get_current_user)):
     try:
-        redis_service.clear_interview_timer(current_user.id)
+        await asyncio.to_thread(redis_service.clear_interview_timer, current_user.id)
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/audio/{ref}")
+async def get_audio(ref: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """Spooled sentence audio, by the reference in its WebSocket frame; supports single byte-range requests"""
+    try:
+        located = await asyncio.to_thread(audio_spool.locate, ref)
+    except MisroutedAudio as e:
+        # Another host wrote this segment and the spool directory is not shared, so only that host can serve it
+        logger.warning(f"/audio request for host {e.owner}'s segment reached another host; set AUDIO_SPOOL_URL per host or share AUDIO_SPOOL_DIR")
+        raise HTTPException(status_code=421, detail="Audio is held by another host")
+    if not located:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    segment, offset, length, audio_format = located
+    requested = parse_range(range_header, length)
+    if requested is None:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{length}"})
+    first, last = requested
+    # The reference is signed and never reused, so the audio behind it can be cached for its lifetime
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "private, max-age=900, immutable"}
+    if range_header:
+        headers["Content-Range"] = f"bytes {first}-{last}/{length}"
+    try:
+        # Reading the mapping can fault pages in from disk
+        body = await asyncio.to_thread(segment.read, offset + first, last - first + 1)
+    except ValueError:
+        # The segment expired and was closed after it was located
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    return Response(content=body, status_code=206 if range_header else 200, headers=headers, media_type=mime_type(audio_format))
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics; queue and admission gauges are refreshed on each scrape"""
+    try:
+        queue_length, slots_in_use, slots_limit = await asyncio.gather(
+            asyncio.to_thread(redis_service.get_queue_length),
+            asyncio.to_thread(redis_service.get_active_users_count),
+            asyncio.to_thread(redis_service.get_admission_limit)
+        )
+        QUEUE_LENGTH.set(queue_length)
+        ADMISSION_SLOTS_IN_USE.set(slots_in_use)
+        ADMISSION_SLOTS_LIMIT.set(slots_limit)
+    except Exception as e:
+        logger.error(f"Failed to refresh queue metrics: {e}")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/upstream-pool-stats")
+async def upstream_pool_stats():
+    """Connection pool usage for the shared upstream HTTP transport"""
+    return upstream.stats()
+
+def require_debug_token(x_debug_token: Optional[str] = Header(None)):
+    # Unconfigured or wrong tokens get a 404 so the endpoints are not advertised
+    if not DEBUG_TOKEN or not x_debug_token or not hmac.compare_digest(x_debug_token, DEBUG_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/debug/event-loop", dependencies=[Depends(require_debug_token)])
+async def event_loop_stats():
+    """Event loop lag and the call sites that blocked it the longest"""
+    return loop_monitor.report()
+
+@app.get("/debug/admission", dependencies=[Depends(require_debug_token)])
+async def admission_stats():
+    """Current admission limit and the most recent decisions behind it"""
+    limit, history = await asyncio.gather(
+        asyncio.to_thread(redis_service.get_admission_limit),
+        asyncio.to_thread(redis_service.get_admission_history)
+    )
+    return {"limit": limit, "history": history}
+
 @app.post("/refresh-token", response_model=Dict[str, Any])
 async def refresh_token(request: RefreshTokenRequest):
     """Refresh access token using refresh token"""
@@ -549,24 +1074,28 @@ async def refresh_token(request: RefreshTokenRequest):
 
 @app.get("/queue-status")
 async def get_queue_status(current_user: User = Depends(get_current_user)):
-    active_count = redis_service.get_active_users_count()
-    queue_position = redis_service.get_queue_position(current_user.id)
+    active_count, queue_position, max_users = await asyncio.gather(
+        asyncio.to_thread(redis_service.get_active_users_count),
+        asyncio.to_thread(redis_service.get_queue_position, current_user.id),
+        asyncio.to_thread(redis_service.get_admission_limit)
+    )
     return {
         "active_users": active_count,
         "queue_position": queue_position,
-        "max_users": redis_service.MAX_CONCURRENT_USERS
+        "max_users": max_users
     }
 
 @app.post("/join-interview-queue")
 async def join_interview_queue(current_user: User = Depends(get_current_user)):
-    if redis_service.add_to_active_users(current_user.id):
+    if await asyncio.to_thread(redis_service.add_to_active_users, current_user.id):
         return {"status": "active"}
     
-    position = redis_service.add_to_queue(current_user.id)
+    position = await asyncio.to_thread(redis_service.add_to_queue, current_user.id)
     return {"status": "queued", "position": position - 1}
 
 @app.post("/leave-interview")
 async def leave_interview(current_user: User = Depends(get_current_user)):
-    redis_service.remove_from_active_users(current_user.id)
-    promoted_users = redis_service.check_and_promote_users()
+    await asyncio.to_thread(redis_service.remove_from_active_users, current_user.id)
+    manager.drop_outbox(current_user.id)
+    promoted_users = await asyncio.to_thread(redis_service.check_and_promote_users)
     return {"status": "success", "promoted_users": promoted_users}
\ No newline at end of file
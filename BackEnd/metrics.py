@@ -0,0 +1,136 @@
+import contextvars
+import functools
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Buckets in seconds, from a fast Redis call up to a slow upstream stream
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STT_DURATION = Histogram(
+    "interview_stt_duration_seconds", "Speech-to-text duration per upload", buckets=LATENCY_BUCKETS
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "interview_llm_time_to_first_token_seconds", "Time from LLM request to first content token", buckets=LATENCY_BUCKETS
+)
+LLM_STREAM_DURATION = Histogram(
+    "interview_llm_stream_duration_seconds", "Total LLM stream time per interviewer turn", buckets=LATENCY_BUCKETS
+)
+LLM_TIER_TIME_TO_FIRST_TOKEN = Histogram(
+    "interview_llm_tier_time_to_first_token_seconds", "Time to first streamed token by routed model tier", ["tier"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_ROUTED_TURNS = Counter(
+    "interview_llm_routed_turns_total", "Interviewer turns by model tier and the signal that chose it", ["tier", "reason"]
+)
+TTS_DURATION = Histogram(
+    "interview_tts_duration_seconds", "Text-to-speech latency per sentence", buckets=LATENCY_BUCKETS
+)
+TTS_AUDIO_BYTES = Histogram(
+    "interview_tts_audio_bytes", "Size of the audio sent for one sentence, by negotiated format", ["format"],
+    buckets=(2_000, 5_000, 10_000, 20_000, 40_000, 80_000, 160_000, 320_000)
+)
+WEBSOCKET_SEND_DURATION = Histogram(
+    "interview_websocket_send_seconds", "Time to send one frame to the client", ["frame_type"], buckets=LATENCY_BUCKETS
+)
+REDIS_CALL_DURATION = Histogram(
+    "interview_redis_call_seconds", "Latency of RedisService calls", ["method"], buckets=LATENCY_BUCKETS
+)
+REDIS_CALL_ERRORS = Counter(
+    "interview_redis_call_errors_total", "RedisService calls that raised", ["method"]
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a scheduled probe", buckets=LATENCY_BUCKETS
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocking_calls_total", "Event loop stalls over the blocking threshold, by call site", ["site"]
+)
+PROMPT_INPUT_TOKENS_SAVED = Counter(
+    "prompt_input_tokens_saved_total", "Estimated tokens removed from documents before prompt generation", ["document"]
+)
+OFFLOAD_DURATION = Histogram(
+    "offload_task_seconds", "Time for work handed to the thread or process pool, including queueing",
+    ["pool", "task"], buckets=LATENCY_BUCKETS
+)
+TIME_TO_FIRST_AUDIO = Histogram(
+    "interview_time_to_first_audio_seconds", "From the LLM request to the first synthesized chunk of a reply",
+    ["policy"], buckets=LATENCY_BUCKETS
+)
+TTS_CHUNKS_PER_TURN = Histogram(
+    "interview_tts_chunks_per_turn", "TTS calls made for one interviewer reply", ["policy"],
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+)
+RATE_LIMIT_WAIT = Histogram(
+    "upstream_rate_limit_wait_seconds", "Time an upstream call waited for shared rate limit capacity",
+    ["operation", "priority"], buckets=LATENCY_BUCKETS
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "upstream_rate_limit_rejections_total", "Upstream calls that waited out their budget without capacity", ["operation", "priority"]
+)
+RATE_LIMIT_LOCAL_WAITS = Counter(
+    "upstream_rate_limit_local_waits_total", "Waits decided from the worker's last view of a bucket, without a Redis call",
+    ["operation"]
+)
+ADMISSION_LIMIT_ADJUSTMENTS = Counter(
+    "interview_admission_limit_adjustments_total", "Admission limit decisions by the signal behind them", ["reason"]
+)
+AUDIO_SPOOL_WRITTEN_BYTES = Counter(
+    "interview_audio_spool_written_bytes_total", "Synthesized audio bytes appended to the on-disk spool"
+)
+AUDIO_SPOOL_RECLAIMED_SEGMENTS = Counter(
+    "interview_audio_spool_reclaimed_segments_total", "Expired audio spool segments deleted"
+)
+SEND_QUEUE_PAUSES = Counter(
+    "interview_send_queue_pauses_total", "Times a producer waited for a slow client to drain its send queue"
+)
+SEND_QUEUE_OVERFLOWS = Counter(
+    "interview_send_queue_overflows_total", "Connections closed because the client could not keep up"
+)
+
+ACTIVE_CONNECTIONS = Gauge("interview_active_websocket_connections", "Open interview WebSocket connections")
+QUEUE_LENGTH = Gauge("interview_queue_length", "Candidates waiting in the interview queue")
+ADMISSION_SLOTS_IN_USE = Gauge("interview_admission_slots_in_use", "Active interview slots in use")
+ADMISSION_SLOTS_LIMIT = Gauge("interview_admission_slots_limit", "Maximum concurrent interview slots")
+ADMISSION_WINDOW_ERROR_RATE = Gauge(
+    "interview_admission_window_error_rate", "Share of failed interviewer turns in the last admission window"
+)
+ADMISSION_WINDOW_SLOW_RATE = Gauge(
+    "interview_admission_window_slow_rate", "Share of interviewer turns over the target latency in the last admission window"
+)
+SEND_QUEUE_BYTES = Gauge("interview_send_queue_bytes", "Serialized frame bytes waiting to be written to clients")
+SEND_QUEUE_FRAMES = Gauge("interview_send_queue_frames", "Frames waiting to be written to clients")
+
+# Set while a timed method runs, so methods that call other timed methods are counted once
+_timing: contextvars.ContextVar[bool] = contextvars.ContextVar("redis_call_timing", default=False)
+
+def track_redis_latency(cls):
+    """Class decorator timing every public method of a Redis-backed service, outermost calls only"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not callable(method):
+            continue
+        setattr(cls, name, _timed(name, method))
+    return cls
+
+def _timed(name, method):
+    histogram = REDIS_CALL_DURATION.labels(method=name)
+    errors = REDIS_CALL_ERRORS.labels(method=name)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _timing.get():
+            return method(*args, **kwargs)
+        token = _timing.set(True)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+            _timing.reset(token)
+    return wrapper
+
+def render_metrics():
+    """Current metrics in the Prometheus text exposition format"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,207 @@
+"""
+Micro-benchmarks for the backend's per-request and per-sentence hot paths.
+
+Covers sentence splitting of streamed LLM text, base64/JSON framing of
+sentence audio, TokenManager token generation and verification,
+InterviewSession.get_context and each RedisService operation used during an
+interview (against the Redis configured in .env; skipped if unreachable).
+
+Results are written as JSON and can be compared with an earlier run:
+    python micro_benchmark.py --output before.json
+    python micro_benchmark.py --baseline before.json --threshold 0.2
+The comparison exits non-zero when any benchmark's median slows down by more
+than the threshold.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List
+
+os.environ.setdefault("SECRET_KEY", "micro-benchmark")
+
+from main import InterviewSession, sentence_frame
+from redis_service import RedisService
+from send_queue import encode_frame
+from sentence_chunker import SentenceChunker, split_sentences
+from token_manager import TokenManager
+
+# A GPT-4 style interviewer reply, streamed in the small chunks the API sends
+REPLY = (
+    "Thanks for walking me through that migration. It sounds like you handled a lot of ambiguity! "
+    "What was the hardest trade-off you had to make, and how did you decide? "
+    "I'd also like to hear how you measured whether it worked."
+)
+CHUNKS = [REPLY[i:i + 4] for i in range(0, len(REPLY), 4)]
+SENTENCE_AUDIO = bytes(48_000)  # about three seconds of 128kbps MP3
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], None]]] = {}
+
+def benchmark(name: str):
+    """Register a setup function that returns the operation to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+@benchmark("split_sentences.stream")
+def bench_split_sentences():
+    def run():
+        buffer = ""
+        for chunk in CHUNKS:
+            sentences, buffer = split_sentences(buffer + chunk)
+    return run
+
+@benchmark("sentence_chunker.adaptive")
+def bench_sentence_chunker():
+    def run():
+        chunker = SentenceChunker("adaptive")
+        for chunk in CHUNKS:
+            chunker.feed(chunk)
+        chunker.flush()
+    return run
+
+@benchmark("sentence_frame.encode")
+def bench_sentence_frame():
+    def run():
+        encode_frame(sentence_frame("What was the hardest trade-off you had to make?", SENTENCE_AUDIO))
+    return run
+
+@benchmark("sentence_frame.encode_spooled")
+def bench_sentence_frame_spooled():
+    # Same sentence with its audio in the spool; the frame carries only the reference
+    audio_ref = "1700000000-0123456789ab.1048576.48000.mp3.0123456789abcdef"
+    def run():
+        encode_frame(sentence_frame("What was the hardest trade-off you had to make?", SENTENCE_AUDIO, audio_ref))
+    return run
+
+@benchmark("token_manager.generate_token")
+def bench_generate_token():
+    manager = TokenManager(os.environ["SECRET_KEY"])
+    return lambda: manager.generate_token("bench-user", "bench@example.com")
+
+@benchmark("token_manager.verify_token")
+def bench_verify_token():
+    manager = TokenManager(os.environ["SECRET_KEY"])
+    token = manager.generate_token("bench-user", "bench@example.com")["access_token"]
+    return lambda: manager.verify_token(token)
+
+@benchmark("interview_session.get_context")
+def bench_get_context():
+    session = InterviewSession("bench-user", "You are Noah, a professional interviewer. " * 40)
+    for i in range(20):
+        session.add_message("assistant" if i % 2 else "user", REPLY)
+    return session.get_context
+
+def redis_benchmarks(service: RedisService, user_id: str) -> Dict[str, Callable[[], None]]:
+    message = {"role": "interviewer", "content": REPLY}
+    return {
+        "redis.get_interview_prompt": lambda: service.get_interview_prompt(user_id),
+        "redis.get_session_snapshot": lambda: service.get_session_snapshot(user_id),
+        "redis.update_conversation_history": lambda: service.update_conversation_history(user_id, message),
+        "redis.add_question_asked": lambda: service.add_question_asked(user_id, "How did you decide?"),
+        "redis.check_interview_time": lambda: service.check_interview_time(user_id),
+        "redis.get_queue_position": lambda: service.get_queue_position(user_id),
+        "redis.get_active_users_count": service.get_active_users_count
+    }
+
+def measure(operation: Callable[[], None], repeat: int, min_time: float) -> Dict[str, float]:
+    """Per-call time in microseconds over several timed rounds, each at least min_time long"""
+    operation()
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        if time.perf_counter() - started >= min_time:
+            break
+        iterations *= 2
+
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        rounds.append((time.perf_counter() - started) / iterations * 1e6)
+    return {
+        "iterations": iterations,
+        "min_us": round(min(rounds), 3),
+        "median_us": round(statistics.median(rounds), 3),
+        "stdev_us": round(statistics.stdev(rounds), 3) if len(rounds) > 1 else 0.0
+    }
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, before in baseline.get("benchmarks", {}).items():
+        after = results["benchmarks"].get(name)
+        if after and after["median_us"] > before["median_us"] * (1 + threshold):
+            regressions.append(f"{name}: {before['median_us']}us -> {after['median_us']}us")
+    return regressions
+
+def run(args) -> Dict:
+    operations = {name: setup() for name, setup in BENCHMARKS.items()}
+
+    service = RedisService()
+    user_id = f"bench-{uuid.uuid4().hex[:8]}"
+    redis_available = False
+    if not args.skip_redis:
+        try:
+            service.client.ping()
+            redis_available = True
+        except Exception as e:
+            print(f"Skipping Redis benchmarks: {e}", file=sys.stderr)
+    if redis_available:
+        prompt_data = {"prompt": REPLY * 20, "created_at": datetime.utcnow().isoformat(), "questions_asked": []}
+        service.store_interview_prompt(user_id, prompt_data)
+        service.init_interview_context(user_id, REPLY * 20, uuid.uuid4().hex)
+        service.start_interview_timer(user_id)
+        # Time the hit path only; a failed setup would otherwise time cache misses and log on every call
+        snapshot = service.get_session_snapshot(user_id)
+        if snapshot and snapshot["interview_id"] and snapshot["timer_started"]:
+            operations.update(redis_benchmarks(service, user_id))
+        else:
+            print("Skipping Redis benchmarks: session setup was not stored", file=sys.stderr)
+
+    results = {}
+    try:
+        for name, operation in operations.items():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(operation, args.repeat, args.min_time)
+    finally:
+        if redis_available:
+            service.clear_interview_data(user_id)
+    return {
+        "python": sys.version.split()[0],
+        "redis": redis_available,
+        "benchmarks": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend hot paths")
+    parser.add_argument("--repeat", type=int, default=7, help="timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per round")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--skip-redis", action="store_true")
+    parser.add_argument("--output", help="optional path to write the JSON results to")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["regressions"] = compare(results, json.load(f), args.threshold)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if results.get("regressions"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
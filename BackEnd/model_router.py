@@ -0,0 +1,63 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+import re
+from typing import Any, Dict, Optional
+
+# Set MODEL_ROUTER=off to send every turn to the strong tier, as before routing existed
+MODEL_ROUTER = os.getenv('MODEL_ROUTER', 'on')
+FAST_MODEL = os.getenv('ROUTER_FAST_MODEL', 'gpt-4o-mini')
+STRONG_MODEL = os.getenv('ROUTER_STRONG_MODEL', 'gpt-4')
+FAST_MAX_TOKENS = int(os.getenv('ROUTER_FAST_MAX_TOKENS', 200))
+STRONG_MAX_TOKENS = int(os.getenv('ROUTER_STRONG_MAX_TOKENS', 300))
+# Answers shorter than this usually need a probing follow-up rather than a transition
+SHORT_ANSWER_WORDS = int(os.getenv('ROUTER_SHORT_ANSWER_WORDS', 25))
+# In the last minutes of the interview replies are wrap-ups, which the fast tier handles well
+CLOSING_SECONDS = int(os.getenv('ROUTER_CLOSING_SECONDS', 90))
+
+# Hedging, uncertainty or asking the interviewer to rephrase
+UNCERTAIN_ANSWER = re.compile(
+    r"\b(not sure|i don'?t know|no idea|i guess|maybe|kind of|sort of|i think so|"
+    r"can you (repeat|rephrase|clarify)|what do you mean|could you explain)\b",
+    re.IGNORECASE
+)
+
+class Route:
+    """Model choice for one interviewer turn"""
+
+    def __init__(self, tier: str, model: str, max_tokens: int, reason: str):
+        self.tier = tier
+        self.model = model
+        self.max_tokens = max_tokens
+        self.reason = reason
+
+    def attributes(self) -> Dict[str, Any]:
+        return {"llm.model": self.model, "llm.tier": self.tier, "llm.route_reason": self.reason}
+
+def _strong(reason: str) -> Route:
+    return Route("strong", STRONG_MODEL, STRONG_MAX_TOKENS, reason)
+
+def _fast(reason: str) -> Route:
+    return Route("fast", FAST_MODEL, FAST_MAX_TOKENS, reason)
+
+def route_turn(answer: str, has_started: bool, remaining_seconds: Optional[float] = None) -> Route:
+    """
+    Pick the model tier for the next interviewer reply from local signals only.
+    The strong tier handles the opening and answers that need a careful
+    follow-up; acknowledging a complete answer and moving on goes to the fast tier.
+    """
+    if MODEL_ROUTER == "off":
+        return _strong("router_off")
+    if not has_started:
+        # The opening digests the full interview brief and sets the tone for the session
+        return _strong("opening")
+    if remaining_seconds is not None and remaining_seconds <= CLOSING_SECONDS:
+        return _fast("closing")
+    if "?" in answer:
+        return _strong("candidate_question")
+    if UNCERTAIN_ANSWER.search(answer):
+        return _strong("uncertain_answer")
+    if len(answer.split()) < SHORT_ANSWER_WORDS:
+        return _strong("short_answer")
+    return _fast("transition")
@@ -1,58 +1,176 @@
-from pymongo.mongo_client import MongoClient
+from pymongo import ASCENDING, DESCENDING, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
+from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
+import asyncio
 import os
 import logging
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+class ConversationWriter:
+    """
+    Write-behind persistence for conversations.
+    Write operations are queued in memory and a background task drains the queue
+    with bulk_write, flushing when a batch fills up or the flush interval passes.
+    """
+    def __init__(self, collection, max_queue_size: int = 1000, batch_size: int = 100, flush_interval: float = 2.0):
+        self.collection = collection
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background flush task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, operation) -> bool:
+        """Queue a write operation without waiting; returns False if it had to be dropped"""
+        try:
+            self.queue.put_nowait(operation)
+            return True
+        except asyncio.QueueFull:
+            # Never block the interview loop on the database - shed load instead
+            self.dropped += 1
+            logging.error(f"Conversation queue full, dropped write ({self.dropped} dropped so far)")
+            return False
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush everything still queued, then stop the background task"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Timed out draining conversation queue, {self.queue.qsize()} writes lost")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Any]):
+        try:
+            # Unordered so one failed write does not discard the rest; readers sort messages by seq
+            await self.collection.bulk_write(batch, ordered=False)
+            logging.info(f"Stored {len(batch)} conversation writes")
+        except BulkWriteError as e:
+            failed = [error["index"] for error in e.details.get("writeErrors", [])]
+            logging.error(
+                f"Failed {len(failed)} of {len(batch)} conversation writes at indices {failed}: "
+                f"{[error.get('errmsg') for error in e.details.get('writeErrors', [])][:3]}"
+            )
+        except Exception as e:
+            logging.error(f"Failed to store conversation batch of {len(batch)}: {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
 
 class MongoDB:
+    # Messages per transcript bucket; keeps every document small and every append constant-size
+    BUCKET_SIZE = 50
+    TRANSCRIPT_TTL = 604800  # 7 days in seconds
+
     def __init__(self):
         MONGO_URI = os.getenv("MONGODB_URI")
         if not MONGO_URI:
             raise ValueError("MONGODB_URI environment variable is not set")
-        
-        # Initialize MongoDB client
-        self.client = MongoClient(MONGO_URI)
+
+        # Initialize MongoDB client; motor connects lazily, so this never blocks or fails on I/O
+        self.client = AsyncIOMotorClient(MONGO_URI)
         self.db = self.client.interview_db
-        self.conversations = self.db.conversations
-        
-        # Test connection
+        self.transcripts = self.db.transcripts
+        self.writer = ConversationWriter(self.transcripts)
+
+    async def connect(self):
+        """Check the connection and set up indexes; run in the background at startup"""
         try:
-            self.client.admin.command('ping')
+            await self.client.admin.command('ping')
             logging.info("Successfully connected to MongoDB!")
         except Exception as e:
             logging.error(f"MongoDB connection failed: {e}")
             raise
+        await self.setup_indexes()
 
-    def setup_indexes(self):
-        # TTL index - documents will be automatically deleted after 7 days
-        self.conversations.create_index(
-            "created_at", 
-            expireAfterSeconds=604800  # 7 days in seconds
+    async def setup_indexes(self):
+        # TTL index - buckets will be automatically deleted after 7 days
+        await self.transcripts.create_index(
+            "created_at",
+            expireAfterSeconds=self.TRANSCRIPT_TTL
         )
-        # Index for email lookups
-        self.conversations.create_index("email")
+        # Appends target one bucket and reads walk an interview's buckets in order
+        await self.transcripts.create_index(
+            [("interview_id", ASCENDING), ("bucket", ASCENDING)],
+            unique=True
+        )
+        # Index for email lookups, newest interviews first
+        await self.transcripts.create_index([("email", ASCENDING), ("created_at", DESCENDING)])
         logging.info("MongoDB indexes created")
 
-    def store_conversation(self, email: str, conversation_data: Dict):
-        """Non-blocking store operation"""
+    def append_message(self, interview_id: str, seq: int, message: Dict[str, str], email: str, user_id: str) -> bool:
+        """Non-blocking append of one message to its transcript bucket"""
         try:
-            conversation_doc = {
-                "email": email,
-                "created_at": datetime.utcnow(),
-                "messages": conversation_data["messages"],
-                "metadata": {
-                    "user_id": conversation_data["user_id"],
-                    "interview_date": datetime.utcnow()
-                }
-            }
-            
-            # Fire and forget - don't wait for DB operation
-            self.conversations.insert_one(conversation_doc)
-            logging.info(f"Queued conversation storage for email: {email}")
+            now = datetime.utcnow()
+            operation = UpdateOne(
+                {"interview_id": interview_id, "bucket": seq // self.BUCKET_SIZE},
+                {
+                    "$push": {"messages": {
+                        "seq": seq,
+                        "role": message["role"],
+                        "content": message["content"],
+                        "timestamp": now
+                    }},
+                    "$inc": {"count": 1},
+                    "$setOnInsert": {
+                        "email": email,
+                        "user_id": user_id,
+                        "created_at": now
+                    }
+                },
+                upsert=True
+            )
+            # Fire and forget - the writer task does the update
+            return self.writer.enqueue(operation)
         except Exception as e:
-            logging.error(f"Failed to queue conversation storage: {e}")
+            logging.error(f"Failed to queue transcript append: {e}")
             # Don't raise the exception - we don't want to interrupt the conversation
+            return False
+
+    def complete_interview(self, interview_id: str) -> bool:
+        """Non-blocking mark of every bucket of an interview as complete"""
+        try:
+            return self.writer.enqueue(UpdateMany(
+                {"interview_id": interview_id},
+                {"$set": {"completed_at": datetime.utcnow()}}
+            ))
+        except Exception as e:
+            logging.error(f"Failed to queue interview completion: {e}")
+            return False
 
-# Initialize MongoDB
-mongodb = MongoDB()
-mongodb.setup_indexes()
\ No newline at end of file
+    async def stream_transcript(self, interview_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every message of an interview in order, one bucket at a time"""
+        cursor = self.transcripts.find(
+            {"interview_id": interview_id},
+            {"messages": 1, "_id": 0}
+        ).sort("bucket", ASCENDING)
+        async for bucket in cursor:
+            for message in sorted(bucket["messages"], key=lambda m: m["seq"]):
+                yield message
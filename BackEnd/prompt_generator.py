@@ -1,29 +1,145 @@
 from typing import Optional
 import logging
 import os
-from anthropic import Anthropic
-import openai
+import httpx
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import asyncio
 from fastapi import HTTPException
+from pydantic import BaseModel, Field
+from document_compactor import compact_documents, estimate_tokens
+from executors import run_in_thread
+from metrics import PROMPT_INPUT_TOKENS_SAVED
+from rate_limiter import BACKGROUND, RateLimiter, is_rate_limited
+from upstream_http import ANTHROPIC_BASE_URL, DEEPSEEK_BASE_URL, PROMPT_TIMEOUT
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# The model only fills in these fields; everything else in the interviewer prompt is rendered locally
+BRIEF_MAX_TOKENS = 700
+
+BRIEF_INSTRUCTIONS = """
+Read the resume and job description and reply with only a JSON object, no other text, in this shape:
+{
+  "candidate_name": "the candidate's first and last name",
+  "company_name": "the hiring company",
+  "job_summary": "the role in at most 40 words",
+  "candidate_summary": "the candidate's relevant experience in at most 40 words",
+  "questions": {
+    "behavioral": "a behavioral question about their resume experience",
+    "role_specific": "a question specific to the role from the job description",
+    "technical": "a technical question relevant to the role",
+    "culture_fit": "a culture fit question",
+    "problem_solving": "a problem-solving scenario",
+    "experience_deep_dive": "a deep dive into one past experience",
+    "hypothetical": "a hypothetical situation question",
+    "career_goals": "a career goals question"
+  }
+}
+Each question is one sentence ending in a question mark, with no quotation marks, colons or numbering.
+"""
+
+INTERVIEW_PROMPT_TEMPLATE = """You are Noah, a professional interviewer conducting a job interview.
+IMPORTANT ROLE INSTRUCTIONS:
+- You are ALWAYS the interviewer, never the interviewee
+- You must ONLY speak as Noah the interviewer
+- Never respond as if you are the candidate
+- Never pretend to be the person being interviewed
+- Always ask questions and respond from the interviewer's perspective
+
+Your task is to interview a candidate named {candidate_name} for a position at {company_name} in a virtual interview.
+The job description is: {job_summary}
+The candidate's background: {candidate_summary}
+
+Interview guidance:
+- Begin with a friendly introduction as Noah the interviewer
+- Ask questions naturally as part of the conversation
+- Balance follow-ups with progression to new topics
+- Focus on their experience and qualifications
+- Assess their fit for the role
+
+Question topics to cover:
+{questions}
+
+IMPORTANT FORMAT RULES:
+- Do not use quotation marks or colons in responses
+- Do not number questions
+- Do not prefix responses with 'Noah:'
+- Speak naturally as the interviewer
+- Never switch perspectives to the candidate's side
+- ALWAYS end your responses with a question
+- Balance between follow-up and new topic questions (unless clarity is crucial)
+- Never end with just a statement"""
+
+class InterviewQuestions(BaseModel):
+    behavioral: str
+    role_specific: str
+    technical: str
+    culture_fit: str
+    problem_solving: str
+    experience_deep_dive: str
+    hypothetical: str
+    career_goals: str
+
+class InterviewBrief(BaseModel):
+    """What prompt generation asks the model for"""
+    candidate_name: str = Field(min_length=1, max_length=100)
+    company_name: str = Field(min_length=1, max_length=100)
+    job_summary: str = Field(min_length=1, max_length=600)
+    candidate_summary: str = Field(min_length=1, max_length=600)
+    questions: InterviewQuestions
+
+def parse_interview_brief(text: str) -> InterviewBrief:
+    """Validate the model's reply, tolerating code fences or text around the JSON object"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in prompt generation response")
+    return InterviewBrief.model_validate_json(text[start:end + 1])
+
+def render_interview_prompt(brief: InterviewBrief) -> str:
+    """Fill the shared interviewer template from a validated brief"""
+    return INTERVIEW_PROMPT_TEMPLATE.format(
+        candidate_name=brief.candidate_name.strip(),
+        company_name=brief.company_name.strip(),
+        job_summary=brief.job_summary.strip(),
+        candidate_summary=brief.candidate_summary.strip(),
+        questions="\n".join(question.strip() for question in brief.questions.model_dump().values())
+    )
+
 class PromptGenerator:
-    def __init__(self):
-        """Initialize prompt generator with API keys"""
-        self.anthropic = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        self.openai_client = openai.OpenAI(api_key=os.getenv("DEEPSEEK_API_KEY"))
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None, limiter: Optional[RateLimiter] = None):
+        """Initialize prompt generator with API keys, the shared upstream HTTP client and rate limiter"""
+        self.http_client = http_client
+        self.limiter = limiter
+        self._anthropic = None
+        self.openai_client = AsyncOpenAI(
+            api_key=os.getenv("DEEPSEEK_API_KEY"),
+            base_url=DEEPSEEK_BASE_URL,
+            http_client=http_client
+        )
         self.claude_model = "claude-3-opus-20240229"
         self.max_retries = 3
         self.retry_delay = 2  # seconds
 
+    @property
+    def anthropic(self):
+        """Claude client, imported and built on first use since it is only a fallback"""
+        if self._anthropic is None:
+            from anthropic import AsyncAnthropic
+            self._anthropic = AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                base_url=ANTHROPIC_BASE_URL,
+                http_client=self.http_client
+            )
+        return self._anthropic
+
     async def generate_interview_prompt(self, resume: str, job_description: str) -> str:
         """Generate interview prompt using Deepseek with Claude fallback"""
         logger.info("Starting prompt generation")
+        resume, job_description = await self.compact_inputs(resume, job_description)
         try:
             # Try Deepseek first
             logger.info("Attempting Deepseek generation")
@@ -38,7 +154,10 @@ class PromptGenerator:
                     logger.info(f"Claude attempt {attempt + 1}/{self.max_retries}")
                     return await self._generate_with_claude(resume, job_description)
                 except Exception as e:
-                    if "overloaded" in str(e).lower():
+                    if is_rate_limited(e):
+                        # Pause Claude calls on every worker, not just this retry loop
+                        if self.limiter:
+                            await self.limiter.drain("anthropic:messages")
                         if attempt < self.max_retries - 1:
                             wait_time = self.retry_delay * (attempt + 1)
                             logger.warning(f"Claude overloaded, retrying in {wait_time}s (attempt {attempt + 1}/{self.max_retries})")
@@ -51,124 +170,64 @@ class PromptGenerator:
             logger.error(f"Prompt generation failed: {e}")
             raise HTTPException(status_code=500, detail="Failed to generate interview prompt")
 
+    async def compact_inputs(self, resume: str, job_description: str):
+        """Strip boilerplate and low-value sections so the model reads less for the same prompt"""
+        try:
+            compact_resume, compact_jd, report = await run_in_thread(
+                "compact_documents", compact_documents, resume, job_description
+            )
+        except Exception as e:
+            logger.error(f"Document compaction failed, sending documents as-is: {e}")
+            return resume, job_description
+        for document, stats in report.items():
+            PROMPT_INPUT_TOKENS_SAVED.labels(document=document).inc(max(0, stats["saved_tokens"]))
+            logger.info(
+                f"Compacted {document} from {stats['original_tokens']} to {stats['compacted_tokens']} tokens "
+                f"({stats['saved_pct']}% saved, dropped sections: {stats['dropped_sections']})"
+            )
+        return compact_resume, compact_jd
+
     async def _generate_with_deepseek(self, resume: str, job_description: str) -> Optional[str]:
         """Generate prompt using Deepseek"""
-        system_prompt = """
-            Create me a prompt in this exact format and fill in the square brackets
-            with the appropriate information based on the resume and job description:
-            "You are Noah, a professional interviewer conducting a job interview.
-            IMPORTANT ROLE INSTRUCTIONS:
-            - You are ALWAYS the interviewer, never the interviewee
-            - You must ONLY speak as Noah the interviewer
-            - Never respond as if you are the candidate
-            - Never pretend to be the person being interviewed
-            - Always ask questions and respond from the interviewer's perspective
-
-            Your task is to interview a candidate named [CANDIDATE NAME] for a position at [COMPANY NAME] in a virtual interview.
-            The job description is: [SUMMARIZE THE JOB DESCRIPTION GREATLY]
-            The candidate's background: [SUMMARIZE THE CANDIDATE'S EXPERIENCE GREATLY]
-
-            Interview guidance:
-            - Begin with a friendly introduction as Noah the interviewer
-            - Ask questions naturally as part of the conversation
-            - Balance follow-ups with progression to new topics
-            - Focus on their experience and qualifications
-            - Assess their fit for the role
-
-            Question topics to cover:
-            [BEHAVIORAL QUESTION ABOUT RESUME EXPERIENCE]
-            [ROLE-SPECIFIC QUESTION FROM JOB DESC]
-            [TECHNICAL QUESTION RELEVANT TO ROLE]
-            [CULTURE FIT QUESTION]
-            [PROBLEM-SOLVING SCENARIO]
-            [PAST EXPERIENCE DEEP DIVE]
-            [HYPOTHETICAL SITUATION QUESTION]
-            [CAREER GOALS QUESTION]
-
-            IMPORTANT FORMAT RULES:
-            - Do not use quotation marks or colons in responses
-            - Do not number questions
-            - Do not prefix responses with 'Noah:'
-            - Speak naturally as the interviewer
-            - Never switch perspectives to the candidate's side
-            - ALWAYS end your responses with a question
-            - Balance between follow-up and new topic questions (unless clarity  is crucial)
-            - Never end with just a statement
-            """
-
         try:
+            if self.limiter:
+                tokens = estimate_tokens(resume) + estimate_tokens(job_description) + BRIEF_MAX_TOKENS
+                await self.limiter.acquire("deepseek:chat", tokens, priority=BACKGROUND)
             response = await self.openai_client.chat.completions.create(
                 model="deepseek-coder",
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": BRIEF_INSTRUCTIONS},
                     {"role": "user", "content": f"Resume:\n{resume}\n\nJob Description:\n{job_description}"}
                 ],
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=BRIEF_MAX_TOKENS,
+                timeout=PROMPT_TIMEOUT
             )
-            return response.choices[0].message.content
+            return render_interview_prompt(parse_interview_brief(response.choices[0].message.content))
         except Exception as e:
             logger.warning(f"Deepseek generation failed: {e}")
+            if self.limiter and is_rate_limited(e):
+                await self.limiter.drain("deepseek:chat")
             return None
 
     async def _generate_with_claude(self, resume: str, job_description: str) -> str:
         """Generate prompt using Claude as fallback"""
         try:
-            system_prompt = """
-            Create me a prompt in this exact format and fill in the square brackets
-            with the appropriate information based on the resume and job description:
-            "You are Noah, a professional interviewer conducting a job interview.
-            IMPORTANT ROLE INSTRUCTIONS:
-            - You are ALWAYS the interviewer, never the interviewee
-            - You must ONLY speak as Noah the interviewer
-            - Never respond as if you are the candidate
-            - Never pretend to be the person being interviewed
-            - Always ask questions and respond from the interviewer's perspective
-
-            Your task is to interview a candidate named [CANDIDATE NAME] for a position at [COMPANY NAME] in a virtual interview.
-            The job description is: [SUMMARIZE THE JOB DESCRIPTION GREATLY]
-            The candidate's background: [SUMMARIZE THE CANDIDATE'S EXPERIENCE GREATLY]
-
-            Interview guidance:
-            - Begin with a friendly introduction as Noah the interviewer
-            - Ask questions naturally as part of the conversation
-            - Balance follow-ups with progression to new topics
-            - Focus on their experience and qualifications
-            - Assess their fit for the role
-
-            Question topics to cover:
-            [BEHAVIORAL QUESTION ABOUT RESUME EXPERIENCE]
-            [ROLE-SPECIFIC QUESTION FROM JOB DESC]
-            [TECHNICAL QUESTION RELEVANT TO ROLE]
-            [CULTURE FIT QUESTION]
-            [PROBLEM-SOLVING SCENARIO]
-            [PAST EXPERIENCE DEEP DIVE]
-            [HYPOTHETICAL SITUATION QUESTION]
-            [CAREER GOALS QUESTION]
-
-            IMPORTANT FORMAT RULES:
-            - Do not use quotation marks or colons in responses
-            - Do not number questions
-            - Do not prefix responses with 'Noah:'
-            - Speak naturally as the interviewer
-            - Never switch perspectives to the candidate's side
-            - ALWAYS end your responses with a question
-            - Balance between follow-up and new topic questions (unless clarity  is crucial)
-            - Never end with just a statement
-            """
-
-            response = self.anthropic.messages.create(
+            if self.limiter:
+                await self.limiter.acquire("anthropic:messages", priority=BACKGROUND)
+            response = await self.anthropic.messages.create(
                 model=self.claude_model,
-                max_tokens=2000,
-                system=system_prompt,
+                max_tokens=BRIEF_MAX_TOKENS,
+                timeout=PROMPT_TIMEOUT,
+                system=BRIEF_INSTRUCTIONS,
                 messages=[{
                     "role": "user",
                     "content": f"Resume:\n{resume}\n\nJob Description:\n{job_description}"
                 }]
             )
             if response.content and len(response.content) > 0:
-                return response.content[0].text
+                return render_interview_prompt(parse_interview_brief(response.content[0].text))
             raise ValueError("No content in Claude response")
         except Exception as e:
             logger.error(f"Claude generation failed: {e}")
-            raise
\ No newline at end of file
+            raise
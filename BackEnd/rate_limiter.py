@@ -0,0 +1,194 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from metrics import RATE_LIMIT_LOCAL_WAITS, RATE_LIMIT_REJECTIONS, RATE_LIMIT_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Provider limits shared by every worker, as name=amount/seconds. "<operation>" buckets count
+# requests; "<operation>:tokens" buckets count estimated prompt plus completion tokens.
+# They apply to the whole cluster, so set them from the account's tier; unset, nothing is throttled.
+UPSTREAM_RATE_LIMITS = os.getenv('UPSTREAM_RATE_LIMITS', '')
+# Optional per-candidate LLM token budget per minute; 0 disables it
+USER_TOKEN_BUDGET = int(os.getenv('USER_TOKEN_BUDGET_PER_MINUTE', 0))
+# Share of every bucket that background work may not use, so live turns still find capacity
+BACKGROUND_RESERVE = float(os.getenv('RATE_LIMIT_BACKGROUND_RESERVE', 0.2))
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+# How long a caller waits for capacity before giving up
+MAX_WAIT = {INTERACTIVE: float(os.getenv('RATE_LIMIT_INTERACTIVE_MAX_WAIT', 5)), BACKGROUND: 60.0}
+
+KEY_PREFIX = "ratelimit"
+
+# Refill every bucket from the Redis clock, then take the cost from all of them or from none.
+# ARGV holds capacity, refill per millisecond, cost and reserve for each key in turn.
+TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 4 - 3])
+    local rate = tonumber(ARGV[i * 4 - 2])
+    local cost = tonumber(ARGV[i * 4 - 1])
+    local reserve = tonumber(ARGV[i * 4])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    tokens = math.min(capacity, tokens + elapsed * rate)
+    levels[i] = tokens
+    if tokens < cost + reserve then
+        wait = math.max(wait, math.ceil((cost + reserve - tokens) / rate))
+    end
+end
+local result = {wait == 0 and 1 or 0, wait}
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 4 - 3])
+    local rate = tonumber(ARGV[i * 4 - 2])
+    if wait == 0 then
+        levels[i] = levels[i] - tonumber(ARGV[i * 4 - 1])
+        redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i]), 'ts', now)
+        redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate) * 2)
+    end
+    result[i + 2] = math.floor(levels[i])
+end
+return result
+"""
+
+class RateLimitExceeded(Exception):
+    """No capacity became available within a background caller's wait budget"""
+
+def is_rate_limited(error: Exception) -> bool:
+    """429 from any provider, or Anthropic's 529 overloaded"""
+    return getattr(error, "status_code", None) in (429, 529) or "overloaded" in str(error).lower()
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """name=amount/seconds pairs into (capacity, refill per millisecond)"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        amount, _, seconds = value.partition("/")
+        limits[name.strip()] = (float(amount), float(amount) / (float(seconds or 60) * 1000))
+    return limits
+
+class RateLimiter:
+    """
+    Token buckets in Redis shared by all workers, one per provider operation
+    plus optional per-user token budgets.
+
+    Each worker remembers the bucket levels Redis last reported. The levels
+    only refill between reports, so a local estimate is an upper bound.
+    When even that bound is too low, the worker waits without calling Redis.
+    """
+
+    def __init__(self, client, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.client = client
+        self.limits = limits if limits is not None else parse_limits(UPSTREAM_RATE_LIMITS)
+        self._take = client.register_script(TAKE_SCRIPT)
+        if not self.limits:
+            logger.info("No UPSTREAM_RATE_LIMITS set; upstream calls are not throttled")
+        # Bucket key -> (level when last seen, perf_counter time it was seen)
+        self._seen: Dict[str, Tuple[float, float]] = {}
+
+    def _buckets(self, operation: str, tokens: int, user_id: Optional[str], priority: str) -> List[Tuple[str, float, float, float, float]]:
+        """(key, capacity, refill per ms, cost, reserve) for each bucket the call draws from"""
+        wanted = [(operation, 1), (f"{operation}:tokens", tokens)]
+        buckets = []
+        for name, cost in wanted:
+            if name in self.limits and cost:
+                capacity, rate = self.limits[name]
+                buckets.append((f"{KEY_PREFIX}:{name}", capacity, rate, cost, capacity * BACKGROUND_RESERVE))
+        if USER_TOKEN_BUDGET and user_id and tokens:
+            capacity = float(USER_TOKEN_BUDGET)
+            buckets.append((f"{KEY_PREFIX}:user:{user_id}:tokens", capacity, capacity / 60000, tokens, 0.0))
+        # A cost larger than the bucket could never be granted; the reserve only holds back background work
+        return [
+            (key, capacity, rate, min(cost, capacity), reserve if priority == BACKGROUND else 0.0)
+            for key, capacity, rate, cost, reserve in buckets
+        ]
+
+    def _local_wait(self, buckets) -> float:
+        """Seconds until the buckets could possibly hold enough, judged from the last levels Redis reported"""
+        now = time.perf_counter()
+        wait_ms = 0.0
+        for key, capacity, rate, cost, reserve in buckets:
+            seen = self._seen.get(key)
+            if seen is None:
+                continue
+            level = min(capacity, seen[0] + (now - seen[1]) * 1000 * rate)
+            if level < cost + reserve:
+                wait_ms = max(wait_ms, (cost + reserve - level) / rate)
+        return wait_ms / 1000
+
+    def _take_from_redis(self, buckets) -> Tuple[bool, float]:
+        args = []
+        for _, capacity, rate, cost, reserve in buckets:
+            args += [capacity, rate, cost, reserve]
+        granted, wait_ms, *levels = self._take(keys=[bucket[0] for bucket in buckets], args=args)
+        now = time.perf_counter()
+        for bucket, level in zip(buckets, levels):
+            self._seen[bucket[0]] = (float(level), now)
+        return bool(granted), wait_ms / 1000
+
+    async def acquire(self, operation: str, tokens: int = 0, user_id: Optional[str] = None, priority: str = INTERACTIVE) -> float:
+        """
+        Wait for capacity for one upstream call and return the seconds waited.
+        Background calls raise RateLimitExceeded once their wait budget is spent; a live
+        interview turn goes ahead anyway rather than stall the candidate. Redis errors let the call through.
+        """
+        buckets = self._buckets(operation, tokens, user_id, priority)
+        if not buckets:
+            return 0.0
+        started = time.perf_counter()
+        deadline = started + MAX_WAIT[priority]
+        while True:
+            wait = self._local_wait(buckets)
+            if wait > 0:
+                RATE_LIMIT_LOCAL_WAITS.labels(operation=operation).inc()
+            else:
+                try:
+                    granted, wait = await asyncio.to_thread(self._take_from_redis, buckets)
+                except Exception as e:
+                    logger.warning(f"Rate limiter unavailable, allowing {operation}: {e}")
+                    return 0.0
+                if granted:
+                    waited = time.perf_counter() - started
+                    RATE_LIMIT_WAIT.labels(operation=operation, priority=priority).observe(waited)
+                    return waited
+            if time.perf_counter() + wait > deadline:
+                RATE_LIMIT_REJECTIONS.labels(operation=operation, priority=priority).inc()
+                if priority == BACKGROUND:
+                    raise RateLimitExceeded(f"No {operation} capacity within {MAX_WAIT[priority]}s")
+                logger.warning(f"No {operation} capacity within {MAX_WAIT[priority]}s, proceeding over the limit")
+                return time.perf_counter() - started
+            # Jitter keeps workers that were refused together from retrying together
+            await asyncio.sleep(wait * (1 + random.random() * 0.2) + 0.005)
+
+    async def drain(self, operation: str):
+        """Empty an operation's request bucket after the provider signals it is overloaded, pausing every worker"""
+        if operation not in self.limits:
+            return
+        key = f"{KEY_PREFIX}:{operation}"
+        capacity, rate = self.limits[operation]
+        try:
+            await asyncio.to_thread(self._reset, key, int(capacity / rate) * 2)
+        except Exception as e:
+            logger.warning(f"Failed to drain rate limit bucket {key}: {e}")
+            return
+        self._seen[key] = (0.0, time.perf_counter())
+
+    def _reset(self, key: str, ttl_ms: int):
+        seconds, microseconds = self.client.time()
+        now_ms = seconds * 1000 + microseconds // 1000
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={"tokens": 0, "ts": now_ms})
+        pipe.pexpire(key, ttl_ms)
+        pipe.execute()
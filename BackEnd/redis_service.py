@@ -1,21 +1,30 @@
 from typing import Optional, Dict, Any, List
-import json
+import fast_json
 import logging
+import time
 from redis import Redis
 from datetime import datetime, timedelta
 import redis
 from redis_config import redis_client
+from admission_limit import ADMISSION_INITIAL_LIMIT, ADMISSION_TARGET_LATENCY, ADMISSION_WINDOW_SECONDS, next_limit
+from metrics import track_redis_latency
+from tracing import trace_methods
 
 logger = logging.getLogger(__name__)
 
+@trace_methods("redis")
+@track_redis_latency
 class RedisService:
     def __init__(self):
         self.client = redis_client
         self.default_expiry = timedelta(hours=4)
         self.INTERVIEW_DURATION = 600  # 10 minutes in seconds
-        self.MAX_CONCURRENT_USERS = 5
         self.QUEUE_KEY = "interview_queue"
         self.ACTIVE_USERS_KEY = "active_interview_users"
+        # Concurrent interview limit, adjusted from turn outcomes and shared by all workers
+        self.ADMISSION_LIMIT_KEY = "admission_limit"
+        self.ADMISSION_HISTORY_KEY = "admission_limit_history"
+        self.ADMISSION_HISTORY_SIZE = 200
         self.CONTEXT_HISTORY_SIZE = 10  # Keep last 10 messages for context
 
     def store_interview_prompt(self, user_id: str, prompt_data: Dict[str, Any]) -> bool:
@@ -30,7 +39,7 @@ class RedisService:
             return self.client.setex(
                 key,
                 int(self.default_expiry.total_seconds()),
-                json.dumps(clean_data)
+                fast_json.dumps(clean_data)
             )
         except Exception as e:
             logger.error(f"Failed to store interview prompt: {str(e)}")
@@ -44,11 +53,23 @@ class RedisService:
             if not data:
                 logger.warning(f"No interview prompt found for user {user_id}")
                 return None
-            return json.loads(data)
+            return fast_json.loads(data)
         except Exception as e:
             logger.error(f"Failed to get interview prompt: {e}")
             return None
 
+    def store_retrieval_index(self, user_id: str, index_data: Dict[str, Any]) -> bool:
+        """Store the serialized snippet index over the user's resume and job description"""
+        try:
+            return self.client.setex(
+                f"interview:index:{user_id}",
+                int(self.default_expiry.total_seconds()),
+                fast_json.dumps(index_data)
+            )
+        except Exception as e:
+            logger.error(f"Failed to store retrieval index: {e}")
+            return False
+
     def store_question_history(self, user_id: str, questions: List[str]) -> bool:
         """Store the history of asked questions"""
         try:
@@ -56,7 +77,7 @@ class RedisService:
             self.client.setex(
                 key,
                 int(self.default_expiry.total_seconds()),
-                json.dumps({
+                fast_json.dumps({
                     "questions": questions,
                     "updated_at": datetime.utcnow().isoformat()
                 })
@@ -73,7 +94,7 @@ class RedisService:
             data = self.client.get(key)
             if not data:
                 return []
-            return json.loads(data)["questions"]
+            return fast_json.loads(data)["questions"]
         except Exception as e:
             logger.error(f"Failed to get question history: {e}")
             return []
@@ -89,7 +110,8 @@ class RedisService:
                 f"interview_timer:{user_id}",
                 f"interview:history:{user_id}",
                 f"interview_history:{user_id}",
-                f"interview:conversation:{user_id}"
+                f"interview:conversation:{user_id}",
+                f"interview:index:{user_id}"
             ]
             
             # Delete all keys
@@ -109,15 +131,17 @@ class RedisService:
         try:
             key = f"interview:context:{user_id}"
             clean_data = {
+                "interview_id": context_data.get("interview_id"),
                 "prompt": context_data.get("prompt", ""),
                 "questions_asked": context_data.get("questions_asked", []),
                 "conversation_history": context_data.get("conversation_history", [])[-self.CONTEXT_HISTORY_SIZE:],
+                "message_count": context_data.get("message_count", 0),
                 "last_interaction": datetime.utcnow().isoformat()
             }
             return self.client.setex(
                 key,
                 int(self.default_expiry.total_seconds()),
-                json.dumps(clean_data)
+                fast_json.dumps(clean_data)
             )
         except Exception as e:
             logger.error(f"Failed to store interview context: {str(e)}")
@@ -130,22 +154,71 @@ class RedisService:
             data = self.client.get(key)
             if not data:
                 return None
-            return json.loads(data)
+            return fast_json.loads(data)
         except Exception as e:
             logger.error(f"Failed to get interview context: {e}")
             return None
 
-    def update_conversation_history(self, user_id: str, message: Dict[str, str]):
-        """Add new message to conversation history"""
+    def init_interview_context(self, user_id: str, prompt: str, interview_id: str) -> bool:
+        """Create an empty interview context so history and questions can be persisted"""
+        return self.store_interview_context(user_id, {
+            "interview_id": interview_id,
+            "prompt": prompt,
+            "questions_asked": [],
+            "conversation_history": []
+        })
+
+    def get_session_snapshot(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch everything needed to rebuild an interview session in one round trip.
+        Returns the prompt data, interview context, remaining interview time and retrieval index,
+        or None if no prompt has been generated for the user.
+        """
+        try:
+            prompt_raw, context_raw, timer_raw, index_raw = self.client.mget([
+                f"interview:prompt:{user_id}",
+                f"interview:context:{user_id}",
+                f"interview_timer:{user_id}",
+                f"interview:index:{user_id}"
+            ])
+            if not prompt_raw:
+                logger.warning(f"No interview prompt found for user {user_id}")
+                return None
+
+            context = fast_json.loads(context_raw) if context_raw else {}
+            remaining = self.INTERVIEW_DURATION
+            if timer_raw:
+                elapsed = datetime.utcnow().timestamp() - float(timer_raw)
+                remaining = max(0, int(self.INTERVIEW_DURATION - elapsed))
+
+            return {
+                "prompt_data": fast_json.loads(prompt_raw),
+                "interview_id": context.get("interview_id"),
+                "conversation_history": context.get("conversation_history", []),
+                "questions_asked": context.get("questions_asked", []),
+                "message_count": context.get("message_count", 0),
+                "timer_started": timer_raw is not None,
+                "remaining_seconds": remaining,
+                "retrieval_index": fast_json.loads(index_raw) if index_raw else None
+            }
+        except Exception as e:
+            logger.error(f"Failed to get session snapshot: {e}")
+            return None
+
+    def update_conversation_history(self, user_id: str, message: Dict[str, str]) -> Optional[int]:
+        """Add new message to conversation history; returns the stored message count, or None if nothing was stored"""
         try:
             context = self.get_interview_context(user_id)
             if context:
                 history = context.get('conversation_history', [])
                 history.append(message)
                 context['conversation_history'] = history[-self.CONTEXT_HISTORY_SIZE:]  # Keep last N messages
+                context['message_count'] = context.get('message_count', 0) + 1  # Total, including trimmed messages
                 self.store_interview_context(user_id, context)
+                return context['message_count']
         except Exception as e:
             logger.error(f"Failed to update conversation history: {e}")
+        return None
 
     def add_question_asked(self, user_id: str, question: str):
         """Track a new question that was asked"""
@@ -180,18 +253,18 @@ class RedisService:
     def update_interview_history(self, user_id: str, messages: list):
         """Update the interview history for a user"""
         key = f"interview:history:{user_id}"
-        self.client.set(key, json.dumps(messages), ex=3600)  # Expire after 1 hour
+        self.client.set(key, fast_json.dumps(messages), ex=3600)  # Expire after 1 hour
 
     def get_interview_history(self, user_id: str) -> list:
         """Get the interview history for a user"""
         key = f"interview:history:{user_id}"
         history = self.client.get(key)
-        return json.loads(history) if history else []
+        return fast_json.loads(history) if history else []
 
-    def start_interview_timer(self, user_id: str):
-        """Start the interview timer for a user"""
+    def start_interview_timer(self, user_id: str, keep_existing: bool = False):
+        """Start the interview timer for a user (optionally keeping a running timer)"""
         start_time = datetime.utcnow().timestamp()
-        self.client.set(f"interview_timer:{user_id}", start_time)
+        self.client.set(f"interview_timer:{user_id}", start_time, nx=keep_existing)
         
     def check_interview_time(self, user_id: str) -> bool:
         """
@@ -216,9 +289,59 @@ class RedisService:
         """Get count of currently active interview users"""
         return self.client.scard(self.ACTIVE_USERS_KEY)
 
+    def get_admission_limit(self) -> int:
+        """Current limit on concurrent interviews"""
+        limit = self.client.get(self.ADMISSION_LIMIT_KEY)
+        return int(limit) if limit else ADMISSION_INITIAL_LIMIT
+
+    def record_turn_outcome(self, latency_seconds: Optional[float], error: bool = False):
+        """Count one interviewer turn, and whether it was slow or failed, towards the current admission window"""
+        key = f"admission_window:{int(time.time() // ADMISSION_WINDOW_SECONDS)}"
+        pipe = self.client.pipeline()
+        pipe.hincrby(key, "turns", 1)
+        if error:
+            pipe.hincrby(key, "errors", 1)
+        if latency_seconds is not None and latency_seconds > ADMISSION_TARGET_LATENCY:
+            pipe.hincrby(key, "slow", 1)
+        pipe.expire(key, ADMISSION_WINDOW_SECONDS * 3)
+        pipe.execute()
+
+    def adjust_admission_limit(self) -> Optional[Dict[str, Any]]:
+        """
+        Move the admission limit one step based on the last complete window.
+        Only the first worker to ask in each window makes the change; the others get None.
+        """
+        window = int(time.time() // ADMISSION_WINDOW_SECONDS) - 1
+        if not self.client.set(f"admission_adjusted:{window}", 1, nx=True, ex=ADMISSION_WINDOW_SECONDS * 3):
+            return None
+        stats = self.client.hgetall(f"admission_window:{window}")
+        turns, errors, slow = (int(stats.get(field, 0)) for field in ("turns", "errors", "slow"))
+        limit = self.get_admission_limit()
+        saturated = self.get_active_users_count() >= limit and self.get_queue_length() > 0
+        new_limit, reason = next_limit(limit, turns, errors, slow, saturated)
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "limit": new_limit,
+            "previous": limit,
+            "reason": reason,
+            "turns": turns,
+            "errors": errors,
+            "slow": slow
+        }
+        pipe = self.client.pipeline()
+        pipe.set(self.ADMISSION_LIMIT_KEY, new_limit)
+        pipe.lpush(self.ADMISSION_HISTORY_KEY, fast_json.dumps(entry))
+        pipe.ltrim(self.ADMISSION_HISTORY_KEY, 0, self.ADMISSION_HISTORY_SIZE - 1)
+        pipe.execute()
+        return entry
+
+    def get_admission_history(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent admission limit decisions, newest first"""
+        return [fast_json.loads(entry) for entry in self.client.lrange(self.ADMISSION_HISTORY_KEY, 0, limit - 1)]
+
     def add_to_active_users(self, user_id: str) -> bool:
         """Add user to active interviews if space available"""
-        if self.get_active_users_count() < self.MAX_CONCURRENT_USERS:
+        if self.get_active_users_count() < self.get_admission_limit():
             self.client.sadd(self.ACTIVE_USERS_KEY, user_id)
             return True
         return False
@@ -235,6 +358,10 @@ class RedisService:
         """Remove user from waiting queue"""
         self.client.lrem(self.QUEUE_KEY, 0, user_id)
 
+    def get_queue_length(self) -> int:
+        """Get number of users waiting in queue"""
+        return self.client.llen(self.QUEUE_KEY)
+
     def get_queue_position(self, user_id: str) -> int:
         """Get user's position in queue (0-based, -1 if not in queue)"""
         queue = self.client.lrange(self.QUEUE_KEY, 0, -1)
@@ -250,7 +377,8 @@ class RedisService:
     def check_and_promote_users(self) -> List[str]:
         """Check queue and promote users if spots available"""
         promoted_users = []
-        while self.get_active_users_count() < self.MAX_CONCURRENT_USERS:
+        limit = self.get_admission_limit()
+        while self.get_active_users_count() < limit:
             next_user = self.get_next_in_queue()
             if not next_user:
                 break
@@ -0,0 +1,120 @@
+"""
+Replays a recorded interview session against the backend for before/after comparisons.
+
+Record traces by starting the backend with RECORD_TRACE_DIR set; each finished
+session is saved as a gzip JSON trace. Replaying one loads it into
+fake_providers.py, so the LLM stream, TTS and STT respond with their recorded
+timing, then drives the backend with the candidate's recorded answers, think
+times and upload sizes. The report has the same shape as load_test.py's, and
+with --baseline it fails when a stage regresses past --threshold.
+
+    python fake_providers.py --port 9000
+    python replay_session.py traces/user-1700000000.json.gz --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+import websockets
+
+from load_test import Candidate, LoadStats, silent_wav
+from session_recorder import load_trace
+
+WAV_HEADER_BYTES = 44
+WAV_BYTES_PER_SECOND = 16000 * 2
+
+class ReplayCandidate(Candidate):
+    """A candidate whose answers, think times and audio sizes come from a recorded trace"""
+
+    def __init__(self, trace: Dict, args, client: httpx.AsyncClient, stats: LoadStats):
+        super().__init__(0, args, client, stats)
+        self.answers = [e for e in trace["events"] if e["type"] == "client_answer"]
+        self.uploads = [e for e in trace["events"] if e["type"] == "stt"]
+
+    async def interview(self):
+        url = self.interview_url()
+        self.stats.attempts["websocket"] += 1
+        try:
+            async with websockets.connect(url, max_size=None) as ws:
+                await self.interviewer_turn(ws, time.perf_counter())
+                for index, answer in enumerate(self.answers):
+                    await asyncio.sleep(answer["think_ms"] / 1000 * self.args.think_scale)
+                    if index < len(self.uploads):
+                        seconds = max(0, self.uploads[index]["bytes"] - WAV_HEADER_BYTES) / WAV_BYTES_PER_SECOND
+                        self.audio = silent_wav(seconds)
+                        await self.step("transcribe", self.transcribe())
+                    started = time.perf_counter()
+                    await ws.send(json.dumps({"type": "answer", "text": answer["text"]}))
+                    await self.interviewer_turn(ws, started)
+        except Exception:
+            self.stats.errors["websocket"] += 1
+            raise
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Stages whose p50 or p95 grew by more than threshold (a fraction) over the baseline"""
+    regressions = []
+    for stage, before in baseline.get("latency_ms", {}).items():
+        after = report["latency_ms"].get(stage)
+        if not after:
+            regressions.append(f"{stage}: missing from this run")
+            continue
+        for key in ("p50", "p95"):
+            if before[key] and after[key] > before[key] * (1 + threshold):
+                regressions.append(f"{stage} {key}: {before[key]}ms -> {after[key]}ms")
+    return regressions
+
+async def run_replay(args) -> Dict:
+    trace = load_trace(args.trace)
+    async with httpx.AsyncClient(timeout=args.http_timeout) as providers:
+        response = await providers.post(f"{args.providers_url}/_replay", json=trace)
+        response.raise_for_status()
+
+    stats = LoadStats()
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.http_timeout) as client:
+        started = time.perf_counter()
+        await ReplayCandidate(trace, args, client, stats).run()
+        elapsed = time.perf_counter() - started
+
+    report = stats.report()
+    report["config"] = {
+        "trace": args.trace,
+        "recorded_at": trace.get("recorded_at"),
+        "base_url": args.base_url,
+        "think_scale": args.think_scale
+    }
+    report["elapsed_seconds"] = round(elapsed, 2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded interview session against the backend")
+    parser.add_argument("trace", help="trace file written by the backend under RECORD_TRACE_DIR")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--providers-url", default="http://localhost:9000", help="fake_providers.py server")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="multiplier for recorded think times")
+    parser.add_argument("--queue-poll", type=float, default=1.0, help="seconds between queue status polls")
+    parser.add_argument("--answer-seconds", type=float, default=0.0)
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("--http-timeout", type=float, default=120.0)
+    parser.add_argument("--audio-formats", default="opus,aac,mp3", help="formats offered on connect, best first")
+    parser.add_argument("--output", help="optional path to write the JSON report to")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown as a fraction, e.g. 0.1 for 10%%")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_replay(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.threshold)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report.get("regressions"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
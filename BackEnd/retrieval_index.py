@@ -0,0 +1,120 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+# Snippets injected per turn, and their combined size
+RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', 3))
+RETRIEVAL_MAX_CHARS = int(os.getenv('RETRIEVAL_MAX_CHARS', 600))
+SNIPPET_CHARS = 200
+MIN_SNIPPET_CHARS = 60
+INDEX_VERSION = 2
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its me my of on or our so that the their them "
+    "they this to was we were what when where which who will with you your did do does had how about just "
+    "like really also there then than very would could can into out up".split()
+)
+
+def stem(word: str) -> str:
+    # Light stemming keeps "services"/"service" and "scaled"/"scale" together without a stemmer dependency
+    for suffix in ("ing", "ed", "es", "s"):
+        # "business", "status" and "analysis" end in s without being plurals
+        if suffix == "s" and word.endswith(("ss", "us", "is")):
+            continue
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    # Dropping a final e lets the bare word meet its suffixed forms: scale, scaled, scales and scaling all give "scal"
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    return [stem(word) for word in TOKEN.findall(text.lower()) if word not in STOPWORDS and len(word) >= 2]
+
+def split_snippets(text: str, max_chars: int = SNIPPET_CHARS) -> List[str]:
+    """Group consecutive lines into snippets of roughly max_chars, never splitting a line"""
+    snippets, current = [], ""
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        # Bullets usually stand alone (one achievement or requirement each), so they start a new snippet
+        is_bullet = line[0] in "-•*▪●"
+        if current and (len(current) + len(line) + 1 > max_chars or (is_bullet and len(current) >= MIN_SNIPPET_CHARS)):
+            snippets.append(current)
+            current = ""
+        current = f"{current} {line}".strip()
+    if current:
+        snippets.append(current)
+    return snippets
+
+class SnippetIndex:
+    """BM25 index over resume and job description snippets for one interview"""
+
+    def __init__(self, snippets: List[Tuple[str, str]], term_counts: List[Dict[str, int]]):
+        self.snippets = snippets
+        self.term_counts = term_counts
+        self.lengths = [sum(counts.values()) for counts in term_counts]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        document_frequency = Counter(term for counts in term_counts for term in counts)
+        total = len(snippets)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    @classmethod
+    def build(cls, resume: str, job_description: str) -> "SnippetIndex":
+        snippets = [("resume", s) for s in split_snippets(resume)] + \
+                   [("job_description", s) for s in split_snippets(job_description)]
+        return cls.from_snippets(snippets)
+
+    @classmethod
+    def from_snippets(cls, snippets: List[Tuple[str, str]]) -> "SnippetIndex":
+        return cls(snippets, [dict(Counter(tokenize(text))) for _, text in snippets])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact form for Redis; document frequencies are recomputed on load"""
+        return {"v": INDEX_VERSION, "snippets": self.snippets, "tf": self.term_counts}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SnippetIndex":
+        snippets = [tuple(s) for s in data["snippets"]]
+        if data.get("v") != INDEX_VERSION:
+            # Terms from an older tokenizer would not match today's queries; re-count them from the stored text
+            return cls.from_snippets(snippets)
+        return cls(snippets, data["tf"])
+
+    def search(self, query: str, top_k: int = RETRIEVAL_TOP_K, max_chars: int = RETRIEVAL_MAX_CHARS) -> List[Tuple[str, str]]:
+        """Snippets most relevant to the query, best first, within a character budget"""
+        terms = set(tokenize(query)) & self.idf.keys()
+        if not terms:
+            return []
+        scores = []
+        for index, counts in enumerate(self.term_counts):
+            norm = K1 * (1 - B + B * self.lengths[index] / self.avg_length) if self.avg_length else K1
+            score = sum(
+                self.idf[term] * counts[term] * (K1 + 1) / (counts[term] + norm)
+                for term in terms if term in counts
+            )
+            if score > 0:
+                scores.append((score, index))
+
+        results, used = [], 0
+        for _, index in sorted(scores, key=lambda item: (-item[0], item[1]))[:top_k]:
+            source, text = self.snippets[index]
+            if used + len(text) > max_chars and results:
+                break
+            results.append((source, text))
+            used += len(text)
+        return results
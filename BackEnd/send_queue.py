@@ -0,0 +1,139 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import base64
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket
+
+import fast_json
+from executors import run_in_thread
+from metrics import (
+    SEND_QUEUE_BYTES, SEND_QUEUE_FRAMES, SEND_QUEUE_OVERFLOWS, SEND_QUEUE_PAUSES, WEBSOCKET_SEND_DURATION
+)
+from tracing import begin_span
+
+logger = logging.getLogger(__name__)
+
+# Per-connection budget for frames serialized but not yet written to the socket
+SEND_QUEUE_MAX_BYTES = int(os.getenv('WS_SEND_QUEUE_MAX_BYTES', 4 * 1024 * 1024))
+# Producers resume once the backlog drains below this
+SEND_QUEUE_RESUME_BYTES = int(os.getenv('WS_SEND_QUEUE_RESUME_BYTES', SEND_QUEUE_MAX_BYTES // 2))
+# A client that cannot drain the backlog within this many seconds is disconnected
+SEND_STALL_TIMEOUT = float(os.getenv('WS_SEND_STALL_TIMEOUT', 15))
+
+# "Try again later": the client reconnects and is caught up from its outbox
+CLOSE_CODE_TOO_SLOW = 1013
+
+def encode_frame(frame: Dict[str, Any]) -> str:
+    """Serialize a frame for the wire; raw audio is base64-encoded here so outboxes keep the smaller binary form"""
+    if isinstance(frame.get("audio"), bytes):
+        frame = {**frame, "audio": base64.b64encode(frame["audio"]).decode("ascii")}
+    return fast_json.dumps(frame)
+
+class SendQueue:
+    """
+    Outbound frames for one WebSocket, written by a dedicated task so a slow
+    client never blocks the code producing frames. Producers wait while the
+    backlog is over budget; if it does not drain in time the socket is closed.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queued_bytes = 0
+        self.closed = False
+        self._room = asyncio.Event()
+        self._room.set()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write())
+
+    async def send(self, frame: Dict[str, Any], frame_type: str = "control") -> bool:
+        """Queue a frame for the client; False if the connection is closed or was too slow to keep up"""
+        if not await self.wait_for_room():
+            return False
+        # Audio frames are hundreds of kilobytes once encoded, so build them off the event loop
+        text = await run_in_thread("encode_frame", encode_frame, frame) if "audio" in frame else encode_frame(frame)
+        size = len(text)
+        self.queued_bytes += size
+        SEND_QUEUE_BYTES.inc(size)
+        SEND_QUEUE_FRAMES.inc()
+        # The span covers time queued plus time on the wire
+        span = begin_span("ws.send", **{"frame.type": frame_type, "frame.seq": frame.get("seq"), "frame.bytes": size})
+        self.queue.put_nowait((text, size, frame_type, span))
+        if self.queued_bytes > SEND_QUEUE_MAX_BYTES:
+            self._room.clear()
+        return True
+
+    async def wait_for_room(self) -> bool:
+        """Backpressure: wait while the client is too far behind, closing the connection if it stays that way"""
+        if self.closed:
+            return False
+        if self._room.is_set():
+            return True
+        SEND_QUEUE_PAUSES.inc()
+        try:
+            await asyncio.wait_for(self._room.wait(), SEND_STALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Closing slow WebSocket client with {self.queued_bytes} bytes unsent")
+            SEND_QUEUE_OVERFLOWS.inc()
+            await self.abort(CLOSE_CODE_TOO_SLOW)
+            return False
+        return not self.closed
+
+    async def drain(self, timeout: float = 5.0):
+        """Wait until every queued frame has been written"""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Send queue did not drain within {timeout}s")
+
+    async def abort(self, code: int):
+        self.stop()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def stop(self):
+        """Stop writing and release the backlog"""
+        if self.closed:
+            return
+        self.closed = True
+        self._room.set()  # Wake waiting producers so they see the connection is closed
+        if self._writer:
+            self._writer.cancel()
+        while not self.queue.empty():
+            _, size, _, span = self.queue.get_nowait()
+            self._release(size)
+            span.end()
+            self.queue.task_done()
+
+    def _release(self, size: int):
+        self.queued_bytes -= size
+        SEND_QUEUE_BYTES.dec(size)
+        SEND_QUEUE_FRAMES.dec()
+        if self.queued_bytes <= SEND_QUEUE_RESUME_BYTES:
+            self._room.set()
+
+    async def _write(self):
+        while True:
+            text, size, frame_type, span = await self.queue.get()
+            try:
+                with WEBSOCKET_SEND_DURATION.labels(frame_type=frame_type).time():
+                    await self.websocket.send_text(text)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket send failed, dropping queued frames: {e}")
+                self.stop()
+                return
+            finally:
+                self._release(size)
+                span.end()
+                self.queue.task_done()
@@ -0,0 +1,103 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+import re
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+# "sentence" sends every sentence to TTS as it completes, "adaptive" starts audio
+# earlier and merges short sentences, "ab" assigns one of the two per interview
+CHUNK_POLICY = os.getenv('TTS_CHUNK_POLICY', 'adaptive')
+POLICIES = ("sentence", "adaptive")
+# The first chunk may end at a clause boundary (comma, semicolon, colon, dash) once it is this long
+FIRST_CHUNK_MIN_CHARS = int(os.getenv('TTS_FIRST_CHUNK_MIN_CHARS', 40))
+# Later sentences shorter than this are held and merged with the next one...
+MERGE_TARGET_CHARS = int(os.getenv('TTS_MERGE_TARGET_CHARS', 120))
+# ...but never held longer than this, so a slow stream does not leave the candidate in silence
+MERGE_MAX_WAIT_MS = float(os.getenv('TTS_MERGE_MAX_WAIT_MS', 400))
+
+# Sentence ends followed by whitespace; the lookbehind keeps the punctuation with its sentence
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?]) +')
+CLAUSE_BOUNDARY = re.compile(r'[,;:–—](?= )')
+
+def split_sentences(buffer: str) -> Tuple[List[str], str]:
+    """Split streamed LLM text into complete sentences and the unfinished remainder"""
+    sentences = SENTENCE_BOUNDARY.split(buffer)
+    if sentences and not sentences[-1].strip().endswith(('.', '!', '?')):
+        remainder = sentences.pop()
+    else:
+        remainder = ""
+    return [s.strip() for s in sentences if s.strip()], remainder
+
+def choose_policy(interview_id: str) -> str:
+    """Chunking policy for an interview; with "ab" the choice is stable for the whole interview"""
+    if CHUNK_POLICY == "ab":
+        return POLICIES[zlib.crc32(interview_id.encode()) % len(POLICIES)]
+    return CHUNK_POLICY if CHUNK_POLICY in POLICIES else "sentence"
+
+class SentenceChunker:
+    """
+    Turns one streamed LLM reply into the text chunks sent to TTS.
+
+    Each chunk costs a TTS round trip, so the adaptive policy trades the
+    number of calls against how soon the candidate hears something: the
+    first chunk is cut at a clause boundary instead of waiting for the end
+    of a long opening sentence, and later short sentences are merged up to
+    a target size or until they have waited out the latency budget.
+    """
+
+    def __init__(self, policy: str = "adaptive"):
+        self.policy = policy
+        self.buffer = ""
+        self.pending = ""
+        self.pending_since: Optional[float] = None
+        self.chunks_emitted = 0
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return the chunks that are ready to synthesize"""
+        self.buffer += text
+        sentences, self.buffer = split_sentences(self.buffer)
+        if self.policy != "adaptive":
+            return self._emitted(sentences)
+
+        chunks = []
+        for sentence in sentences:
+            if self.chunks_emitted + len(chunks) == 0:
+                # Nothing is playing yet, so even a short opener goes straight out
+                chunks.append(sentence)
+            else:
+                self._hold(sentence)
+                if len(self.pending) >= MERGE_TARGET_CHARS:
+                    chunks.append(self._take_pending())
+
+        if self.chunks_emitted + len(chunks) == 0 and len(self.buffer) >= FIRST_CHUNK_MIN_CHARS:
+            clause = CLAUSE_BOUNDARY.search(self.buffer, FIRST_CHUNK_MIN_CHARS - 1)
+            if clause:
+                chunks.append(self.buffer[:clause.end()].strip())
+                self.buffer = self.buffer[clause.end():].lstrip()
+
+        if self.pending and (time.perf_counter() - self.pending_since) * 1000 >= MERGE_MAX_WAIT_MS:
+            chunks.append(self._take_pending())
+        return self._emitted(chunks)
+
+    def flush(self) -> List[str]:
+        """Chunks left once the stream has ended"""
+        if self.buffer.strip():
+            self._hold(self.buffer.strip())
+        self.buffer = ""
+        return self._emitted([self._take_pending()] if self.pending else [])
+
+    def _hold(self, sentence: str):
+        if not self.pending:
+            self.pending_since = time.perf_counter()
+        self.pending = f"{self.pending} {sentence}".strip()
+
+    def _take_pending(self) -> str:
+        chunk, self.pending, self.pending_since = self.pending, "", None
+        return chunk
+
+    def _emitted(self, chunks: List[str]) -> List[str]:
+        self.chunks_emitted += len(chunks)
+        return chunks
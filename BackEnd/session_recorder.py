@@ -0,0 +1,109 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Recording is on when a directory is configured; each interview session becomes one trace file
+RECORD_TRACE_DIR = os.getenv('RECORD_TRACE_DIR', '')
+TRACE_VERSION = 1
+# A recording untouched this long belongs to an abandoned session; it is saved as it stands and dropped
+RECORD_IDLE_TTL = int(os.getenv('RECORD_IDLE_TTL', 900))
+
+class SessionRecorder:
+    """
+    Captures the timing of one interview session: upstream LLM chunk arrivals,
+    TTS and STT latencies and sizes, and when the client sent each answer.
+    Offsets are milliseconds since the session started.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.started = time.perf_counter()
+        self.recorded_at = datetime.utcnow().isoformat()
+        self.events: List[Dict[str, Any]] = []
+        self.last_interviewer_output = self.started
+        self.last_event = self.started
+
+    def elapsed_ms(self, since: Optional[float] = None) -> float:
+        return round((time.perf_counter() - (since or self.started)) * 1000, 1)
+
+    def record(self, event_type: str, **data):
+        self.last_event = time.perf_counter()
+        self.events.append({"t": self.elapsed_ms(), "type": event_type, **data})
+
+    def record_llm_turn(self, first_chunk_ms: float, chunks: List[List[Any]], tier: str = "", model: str = ""):
+        """chunks are [ms since the previous chunk, content] pairs"""
+        self.record("llm_turn", first_chunk_ms=first_chunk_ms, chunks=chunks, tier=tier, model=model)
+
+    def record_tts(self, chars: int, size: int, latency_ms: float):
+        self.record("tts", chars=chars, bytes=size, latency_ms=latency_ms)
+        self.last_interviewer_output = time.perf_counter()
+
+    def record_stt(self, size: int, latency_ms: float, text: Optional[str]):
+        self.record("stt", bytes=size, latency_ms=latency_ms, text=text)
+
+    def record_answer(self, text: str):
+        # Think time is measured from the interviewer's last sentence, which is what a replay waits on
+        self.record("client_answer", text=text, think_ms=self.elapsed_ms(self.last_interviewer_output))
+
+    def save(self, directory: str) -> Path:
+        path = Path(directory) / f"{self.user_id}-{int(time.time())}.json.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        trace = {
+            "version": TRACE_VERSION,
+            "user_id": self.user_id,
+            "recorded_at": self.recorded_at,
+            "events": self.events
+        }
+        with gzip.open(path, "wt") as f:
+            json.dump(trace, f, separators=(",", ":"))
+        return path
+
+def load_trace(path: str) -> Dict[str, Any]:
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt") as f:
+        trace = json.load(f)
+    if trace.get("version") != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {trace.get('version')}")
+    return trace
+
+# Active recordings by user id, so /transcribe can add to the session's trace
+_recorders: Dict[str, SessionRecorder] = {}
+
+def start_recording(user_id: str) -> Optional[SessionRecorder]:
+    if not RECORD_TRACE_DIR:
+        return None
+    expire_recordings()
+    # A restarted interview replaces the user's earlier recording; keep what it captured
+    finish_recording(user_id)
+    _recorders[user_id] = SessionRecorder(user_id)
+    return _recorders[user_id]
+
+def get_recorder(user_id: Optional[str]) -> Optional[SessionRecorder]:
+    return _recorders.get(user_id) if user_id else None
+
+def expire_recordings():
+    """Save and drop recordings of sessions that were abandoned, timed out or lost with a crashed handler"""
+    cutoff = time.perf_counter() - RECORD_IDLE_TTL
+    for user_id in [u for u, recorder in _recorders.items() if recorder.last_event < cutoff]:
+        logger.info(f"Recording for user {user_id} idle for {RECORD_IDLE_TTL}s, saving it as it stands")
+        finish_recording(user_id)
+
+def finish_recording(user_id: str):
+    recorder = _recorders.pop(user_id, None)
+    if not recorder or not recorder.events:
+        return
+    try:
+        path = recorder.save(RECORD_TRACE_DIR)
+        logger.info(f"Saved session trace to {path}")
+    except Exception as e:
+        logger.error(f"Failed to save session trace: {e}")
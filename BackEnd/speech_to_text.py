@@ -1,23 +1,42 @@
+import asyncio
 import logging
 from typing import Optional, Union, List
 import openai
 from pathlib import Path
 import tempfile
 import os
-from pydub import AudioSegment
 from openai import AsyncOpenAI
+from executors import run_in_process
+from rate_limiter import RateLimiter
+from upstream_http import STT_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+CHUNK_LENGTH_MS = 10 * 60 * 1000  # 10 minutes
+
+def split_audio(file_path: str, chunk_length_ms: int = CHUNK_LENGTH_MS) -> List[str]:
+    """Decode an audio file and write it back out as WAV chunks; runs in the process pool"""
+    # pydub is only needed for oversized uploads, so keep it off the import path
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(file_path)
+    paths = []
+    for i in range(0, len(audio), chunk_length_ms):
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+            audio[i:i + chunk_length_ms].export(temp_file.name, format='wav')
+            paths.append(temp_file.name)
+    return paths
+
 class SpeechToText:
-    def __init__(self, client: AsyncOpenAI, model="whisper-1"):
+    def __init__(self, client: AsyncOpenAI, model="whisper-1", limiter: Optional[RateLimiter] = None):
         """
         Initialize the Speech to Text converter.
         Args:
             client (AsyncOpenAI): The OpenAI client to use
             model (str): The Whisper model to use (default: "whisper-1")
+            limiter (RateLimiter): Shared upstream rate limiter, if any
         """
         self.client = client
+        self.limiter = limiter
         self.model = model
         self.supported_formats = ['.mp3', '.mp4', '.mpeg', '.mpga', '.m4a', '.wav', '.webm']
         self.max_file_size = 25 * 1024 * 1024  # 25 MB in bytes
@@ -40,28 +59,19 @@ class SpeechToText:
             Transcribed text or None if error occurs
         """
         try:
-            # Create temporary file for the audio
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                if isinstance(audio_file, bytes):
-                    temp_file.write(audio_file)
-                elif isinstance(audio_file, (str, Path)):
-                    with open(audio_file, 'rb') as f:
-                        temp_file.write(f.read())
-                temp_file.flush()
-                
-                try:
-                    # Open and transcribe the audio
-                    with open(temp_file.name, "rb") as audio:
-                        response = await self.client.audio.transcriptions.create(
-                            model=self.model,
-                            file=audio,
-                            language=language,
-                            prompt=prompt or "This is an interview conversation."
-                        )
-                    return response.text
-                finally:
-                    # Clean up temp file
-                    os.unlink(temp_file.name)
+            # Upload straight from memory; a temp file would mean blocking disk I/O on the event loop
+            if isinstance(audio_file, (str, Path)):
+                audio_file = await asyncio.to_thread(Path(audio_file).read_bytes)
+            if self.limiter:
+                await self.limiter.acquire("openai:stt")
+            response = await self.client.audio.transcriptions.create(
+                model=self.model,
+                file=("audio.wav", audio_file),
+                language=language,
+                prompt=prompt or "This is an interview conversation.",
+                timeout=STT_TIMEOUT
+            )
+            return response.text
 
         except Exception as e:
             logger.error(f"Transcription error: {str(e)}")
@@ -92,7 +102,9 @@ class SpeechToText:
             if timestamp_granularities:
                 params["timestamp_granularities"] = timestamp_granularities
 
-            response = await self.client.audio.transcriptions.create(**params)
+            if self.limiter:
+                await self.limiter.acquire("openai:stt")
+            response = await self.client.audio.transcriptions.create(**params, timeout=STT_TIMEOUT)
             
             if response_format == "verbose_json":
                 return response.words if hasattr(response, 'words') else response
@@ -112,31 +124,28 @@ class SpeechToText:
     ) -> str:
         """Handle files larger than 25MB by splitting them into chunks."""
         try:
-            audio = AudioSegment.from_file(str(file_path))
-            chunk_length = 10 * 60 * 1000  # 10 minutes in milliseconds
+            # Decoding and re-encoding is CPU-heavy, so split into 10-minute chunks in the process pool
+            chunk_paths = await run_in_process("split_audio", split_audio, str(file_path))
             chunks = []
-            
-            # Split audio into 10-minute chunks
-            for i in range(0, len(audio), chunk_length):
-                chunk = audio[i:i + chunk_length]
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                    chunk.export(temp_file.name, format='wav')
-                    with open(temp_file.name, 'rb') as chunk_file:
-                        # Use the last part of previous chunk as prompt for context
-                        chunk_prompt = prompt
-                        if chunks and i > 0:
-                            chunk_prompt = f"{chunks[-1][-200:]} {prompt if prompt else ''}"
-                        
-                        result = await self._transcribe_audio(
-                            chunk_file, chunk_prompt, response_format, 
-                            temperature, language, None
-                        )
-                        if result:
-                            chunks.append(result)
-                    
-                    # Clean up temporary file
-                    os.unlink(temp_file.name)
-            
+            try:
+                for index, chunk_path in enumerate(chunk_paths):
+                    chunk_audio = await asyncio.to_thread(Path(chunk_path).read_bytes)
+                    # Use the last part of previous chunk as prompt for context
+                    chunk_prompt = prompt
+                    if chunks and index > 0:
+                        chunk_prompt = f"{chunks[-1][-200:]} {prompt if prompt else ''}"
+
+                    result = await self._transcribe_audio(
+                        ("chunk.wav", chunk_audio), chunk_prompt, response_format,
+                        temperature, language, None
+                    )
+                    if result:
+                        chunks.append(result)
+            finally:
+                # Clean up temporary files
+                for chunk_path in chunk_paths:
+                    os.unlink(chunk_path)
+
             return " ".join(chunks)
 
         except Exception as e:
@@ -209,7 +218,9 @@ class SpeechToText:
             if prompt:
                 params["prompt"] = prompt
 
-            response = await self.client.audio.translations.create(**params)
+            if self.limiter:
+                await self.limiter.acquire("openai:stt")
+            response = await self.client.audio.translations.create(**params, timeout=STT_TIMEOUT)
             return response.text if hasattr(response, 'text') else response
 
         except Exception as e:
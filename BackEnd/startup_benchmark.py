@@ -0,0 +1,80 @@
+"""
+Startup-time benchmark for the backend.
+
+Each run starts a fresh interpreter so module caches are cold, then reports
+how long `import main` takes, how long the FastAPI lifespan takes to start,
+and the latency of the first requests served.
+
+Usage:
+    python startup_benchmark.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Executed in a fresh interpreter for every run
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    client.get("/health")
+    t3 = time.perf_counter()
+    client.post("/generate-token", json={"user_id": "bench", "email": "bench@example.com"})
+    t4 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "lifespan_startup_ms": (t2 - t1) * 1000,
+    "first_health_ms": (t3 - t2) * 1000,
+    "first_token_ms": (t4 - t3) * 1000,
+}))
+"""
+
+def run_once() -> dict:
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "startup-benchmark")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    # Logging goes to stderr; the probe's JSON is the last stdout line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def summarize(runs: list) -> dict:
+    summary = {}
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        summary[key] = {
+            "median": round(statistics.median(values), 2),
+            "min": round(min(values), 2),
+            "max": round(max(values), 2)
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import and first-request latency")
+    parser.add_argument("--runs", type=int, default=5, help="number of cold starts to measure")
+    parser.add_argument("--output", help="optional path to write the JSON report to")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    report = {"runs": args.runs, "results": summarize(runs)}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
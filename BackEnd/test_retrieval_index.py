@@ -0,0 +1,38 @@
+import unittest
+
+from retrieval_index import SnippetIndex, tokenize
+
+class TokenizeTest(unittest.TestCase):
+    def test_inflections_share_a_term(self):
+        groups = [
+            ["service", "services"],
+            ["scale", "scaled", "scales", "scaling"],
+            ["database", "databases"],
+            ["process", "processes"],
+            ["business", "businesses"],
+            ["migration", "migrations"],
+        ]
+        for words in groups:
+            with self.subTest(words=words):
+                self.assertEqual(len({tokenize(word)[0] for word in words}), 1)
+
+    def test_stopwords_are_dropped(self):
+        self.assertEqual(tokenize("the API and the databases"), tokenize("api databases"))
+
+class SnippetIndexTest(unittest.TestCase):
+    def test_singular_query_finds_plural_snippet(self):
+        index = SnippetIndex.build(
+            "- Scaled our payment services to 40 databases across three regions\n- Mentored two junior engineers",
+            "- You will own our frontend design system"
+        )
+        results = index.search("how did you scale the database service")
+        self.assertEqual([source for source, _ in results], ["resume"])
+
+    def test_older_index_is_recounted(self):
+        index = SnippetIndex.build("- Scaled our payment services", "")
+        data = index.to_dict()
+        data["v"], data["tf"] = 1, [{"servic": 1, "scal": 1}]
+        self.assertEqual(SnippetIndex.from_dict(data).term_counts, index.term_counts)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,42 +1,49 @@
 import openai
 import logging
-import redis
 import time
 import io
 from base64 import b64encode
-from typing import Tuple
-import uuid
-from datetime import timedelta
+from typing import Optional
 import os
 from openai import AsyncOpenAI
+from audio_formats import TTS_TRANSCODE, transcode
+from executors import run_in_process
+from metrics import TTS_AUDIO_BYTES
+from rate_limiter import RateLimiter
+from upstream_http import TTS_TIMEOUT
 
 class TextToSpeech:
-    def __init__(self, client: AsyncOpenAI, model="tts-1", voice="alloy"):
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model="tts-1",
+        voice="alloy",
+        limiter: Optional[RateLimiter] = None
+    ):
         self.client = client
+        self.limiter = limiter
         self.model = model
         self.voice = voice
-        self.redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'redis'),
-            port=int(os.getenv('REDIS_PORT', 6379)),
-            username=os.getenv('REDIS_USERNAME', 'default'),
-            password=os.getenv('REDIS_PASSWORD', ''),
-            decode_responses=False
-        )
 
-    async def generate_speech(self, text: str) -> bytes:
+    async def generate_speech(self, text: str, audio_format: str = "mp3", bitrate: int = 0) -> bytes:
         if len(text) > 4096:
             raise ValueError("Text length exceeds 4096 character limit")
         try:
+            if self.limiter:
+                await self.limiter.acquire("openai:tts")
             response = await self.client.audio.speech.create(
                 model=self.model,
                 voice=self.voice,
-                input=text
+                input=text,
+                response_format=audio_format,
+                timeout=TTS_TIMEOUT
             )
             
             # Get the binary audio data
             audio_data = response.content
             if not audio_data:
                 raise ValueError("Received empty audio data from OpenAI")
+            audio_data = await self.compress(audio_data, audio_format, bitrate)
             
             logging.info("Successfully generated speech audio")
             return audio_data
@@ -45,43 +52,14 @@ class TextToSpeech:
             logging.error(f"Error generating speech: {str(e)}", exc_info=True)
             raise  # Re-raise the exception instead of returning None
 
-    async def text_to_speech(self, text: str, user_id: str) -> Tuple[bytes, str]:
-        """
-        Convert text to speech and store in Redis temporarily
-        Returns the audio data and a unique key for cleanup
-        """
-        try:
-            # Generate speech using OpenAI's API or your custom endpoint
-            # Replace this with the correct API call. For example:
-            response = await self.client.audio.speech.create(
-                model=self.model,
-                voice=self.voice,
-                speed=1.05,
-                input=text
-            )
-            
-            # Assuming the response contains 'content' with binary data
-            audio_content = response['content']  # Adjust based on actual response structure
-            
-            # Generate a unique key for this audio
-            audio_key = f"audio:{user_id}:{uuid.uuid4().hex}"
-            
-            # Store in Redis with 5-minute expiration
-            self.redis_client.setex(audio_key, timedelta(minutes=5), audio_content)
-            
-            # Return both the audio content and key
-            return audio_content, audio_key
-            
-        except Exception as e:
-            logging.error(f"Error in text_to_speech: {str(e)}")
-            raise
-
-    def delete_audio(self, audio_key):
-        """
-        Delete audio data from Redis
-        """
-        try:
-            self.redis_client.delete(audio_key)
-            logging.info(f"Successfully deleted audio: {audio_key}")
-        except Exception as e:
-            logging.error(f"Error deleting audio data: {e}") 
\ No newline at end of file
+    async def compress(self, audio_data: bytes, audio_format: str, bitrate: int) -> bytes:
+        """Re-encode at a speech bitrate; the provider's own encoding is kept if that fails or is no smaller"""
+        if bitrate and TTS_TRANSCODE == "on":
+            try:
+                smaller = await run_in_process("tts_transcode", transcode, audio_data, audio_format, bitrate)
+                if smaller and len(smaller) < len(audio_data):
+                    audio_data = smaller
+            except Exception as e:
+                logging.warning(f"Sending {audio_format} audio untranscoded: {e}")
+        TTS_AUDIO_BYTES.labels(format=audio_format).observe(len(audio_data))
+        return audio_data
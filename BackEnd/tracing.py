@@ -0,0 +1,218 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Sequence
+
+import httpx
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor, SpanExporter, SpanExportResult
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+logger = logging.getLogger(__name__)
+
+# none, console, file, memory, otlp, or a "module:Class" path to any SpanExporter
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'none')
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+# Hosts trusted with our trace context; a leading dot matches subdomains. Third-party APIs never get it.
+TRACE_PROPAGATE_HOSTS = [
+    h.strip().lower() for h in os.getenv('TRACE_PROPAGATE_HOSTS', 'localhost,127.0.0.1').split(",") if h.strip()
+]
+
+tracer = trace.get_tracer("dellio.backend")
+
+# User and turn ids for the work in progress; copied onto every span started beneath them
+_span_tags: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("span_tags", default={})
+
+# Set when TRACE_EXPORTER=memory so tests and local tools can inspect finished spans
+memory_exporter: Optional[InMemorySpanExporter] = None
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends finished spans to a JSON-lines file for local inspection"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = []
+        for span in spans:
+            context = span.get_span_context()
+            lines.append(json.dumps({
+                "name": span.name,
+                "trace_id": format(context.trace_id, "032x"),
+                "span_id": format(context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "start_ns": span.start_time,
+                "duration_ms": (span.end_time - span.start_time) / 1e6,
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes or {})
+            }))
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+            return SpanExportResult.SUCCESS
+        except OSError as e:
+            logger.error(f"Failed to write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+
+def _build_exporter(name: str) -> Optional[SpanExporter]:
+    global memory_exporter
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return JsonFileSpanExporter(TRACE_FILE)
+    if name == "memory":
+        memory_exporter = InMemorySpanExporter()
+        return memory_exporter
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if ":" in name:
+        module_name, class_name = name.split(":", 1)
+        return getattr(importlib.import_module(module_name), class_name)()
+    return None
+
+def setup_tracing():
+    """Install the tracer provider and the exporter selected by TRACE_EXPORTER"""
+    if TRACE_EXPORTER == "none":
+        return
+    try:
+        exporter = _build_exporter(TRACE_EXPORTER)
+    except Exception as e:
+        logger.error(f"Tracing disabled, could not build exporter {TRACE_EXPORTER}: {e}")
+        return
+    if exporter is None:
+        logger.error(f"Tracing disabled, unknown exporter {TRACE_EXPORTER}")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "dellio-backend"}))
+    # Local exporters flush immediately so the file or memory view is always current
+    if TRACE_EXPORTER in ("file", "memory", "console"):
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+    else:
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled with {TRACE_EXPORTER} exporter")
+
+def extract_context(carrier: Dict[str, str]):
+    """Continue a trace from W3C trace-context headers (traceparent/tracestate)"""
+    return propagate.extract(carrier)
+
+@contextmanager
+def tag_spans(**tags):
+    """Attach tags such as user.id and turn.id to every span started inside the block"""
+    token = _span_tags.set({**_span_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _span_tags.reset(token)
+
+@contextmanager
+def start_span(name: str, context=None, **attributes):
+    with tracer.start_as_current_span(name, context=context) as span:
+        for key, value in {**_span_tags.get(), **attributes}.items():
+            if value is not None:
+                span.set_attribute(key, value)
+        yield span
+
+def begin_span(name: str, **attributes):
+    """Start a span without making it current; the caller ends it and may activate it with use_span"""
+    span = tracer.start_span(name)
+    for key, value in {**_span_tags.get(), **attributes}.items():
+        if value is not None:
+            span.set_attribute(key, value)
+    return span
+
+def fail_span(span, error: BaseException):
+    """Record an exception on a span started with begin_span and mark it failed"""
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+def use_span(span):
+    return trace.use_span(span, end_on_exit=False)
+
+def tag_current_span(**attributes):
+    span = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key, value)
+
+# Prefixes of trace_methods classes with a method already running in this context
+_traced_prefixes: contextvars.ContextVar[frozenset] = contextvars.ContextVar("traced_prefixes", default=frozenset())
+
+def trace_methods(prefix: str):
+    """Class decorator giving every public method its own span; calls between the class's own methods share the outer span"""
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not callable(method):
+                continue
+            setattr(cls, name, _traced(prefix, f"{prefix}.{name}", method))
+        return cls
+    return decorate
+
+def _traced(prefix: str, span_name: str, method):
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            active = _traced_prefixes.get()
+            if prefix in active:
+                return await method(*args, **kwargs)
+            token = _traced_prefixes.set(active | {prefix})
+            try:
+                with start_span(span_name):
+                    return await method(*args, **kwargs)
+            finally:
+                _traced_prefixes.reset(token)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        active = _traced_prefixes.get()
+        if prefix in active:
+            return method(*args, **kwargs)
+        token = _traced_prefixes.set(active | {prefix})
+        try:
+            with start_span(span_name):
+                return method(*args, **kwargs)
+        finally:
+            _traced_prefixes.reset(token)
+    return wrapper
+
+def propagates_to(host: str) -> bool:
+    host = host.lower()
+    return any(host == allowed or (allowed.startswith(".") and host.endswith(allowed)) for allowed in TRACE_PROPAGATE_HOSTS)
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Wraps an httpx transport with one span per upstream request; trace headers go only to internal hosts"""
+
+    def __init__(self, wrapped: httpx.AsyncBaseTransport):
+        self.wrapped = wrapped
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # For streamed responses this covers time to headers; callers span the body themselves
+        with start_span(
+            f"upstream {request.method} {request.url.host}",
+            **{"http.method": request.method, "http.url": str(request.url.copy_with(query=None))}
+        ) as span:
+            if propagates_to(request.url.host):
+                propagate.inject(request.headers)
+            response = await self.wrapped.handle_async_request(request)
+            span.set_attribute("http.status_code", response.status_code)
+            return response
+
+    async def aclose(self):
+        await self.wrapped.aclose()
@@ -0,0 +1,96 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import importlib.util
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import httpx
+
+from tracing import TracingTransport
+
+logger = logging.getLogger(__name__)
+
+# Provider endpoints; override to point the backend at other deployments
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+DEEPSEEK_BASE_URL = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
+ANTHROPIC_BASE_URL = os.getenv('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')
+
+# Pool sizing: every interview turn streams one LLM response and runs several TTS calls
+MAX_CONNECTIONS = int(os.getenv('UPSTREAM_MAX_CONNECTIONS', 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('UPSTREAM_MAX_KEEPALIVE', 40))
+KEEPALIVE_EXPIRY = float(os.getenv('UPSTREAM_KEEPALIVE_EXPIRY', 120))
+WARM_CONNECTIONS_PER_HOST = int(os.getenv('UPSTREAM_WARM_CONNECTIONS', 2))
+
+# Per-operation timeouts: connect quickly, then allow for how long each operation runs
+LLM_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
+TTS_TIMEOUT = httpx.Timeout(connect=5.0, read=15.0, write=10.0, pool=5.0)
+STT_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=5.0)
+PROMPT_TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=10.0, pool=5.0)
+
+class UpstreamHTTP:
+    """Shared HTTP transport for every AI provider so keep-alive connections are reused across calls"""
+
+    def __init__(self):
+        # HTTP/2 multiplexes concurrent streams over one connection when the h2 package is installed
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.transport = httpx.AsyncHTTPTransport(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+        self.client = httpx.AsyncClient(
+            transport=TracingTransport(self.transport),
+            timeout=LLM_TIMEOUT,
+            event_hooks={"request": [self._count_request]}
+        )
+
+    async def _count_request(self, request: httpx.Request):
+        self.requests[request.url.host] += 1
+
+    async def warmup(self, base_urls: List[str]):
+        """Open connections to each provider ahead of time so TLS handshakes stay off the hot path"""
+        async def touch(url: str):
+            try:
+                # Any response, even an error status, leaves a warm connection in the pool
+                await self.client.head(url, timeout=TTS_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Connection warmup to {url} failed: {e}")
+
+        await asyncio.gather(*[
+            touch(url) for url in base_urls for _ in range(WARM_CONNECTIONS_PER_HOST)
+        ])
+        logger.info(f"Upstream connection pool warmed up: {self.stats()['hosts']}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection counts per host plus request totals"""
+        hosts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"connections": 0, "idle": 0, "http2": 0})
+        # httpx does not expose its pool publicly, so read the underlying httpcore pool defensively
+        pool = getattr(self.transport, "_pool", None)
+        for connection in getattr(pool, "connections", []):
+            try:
+                host = connection._origin.host.decode()
+                hosts[host]["connections"] += 1
+                if connection.is_idle():
+                    hosts[host]["idle"] += 1
+                if "HTTP/2" in connection.info():
+                    hosts[host]["http2"] += 1
+            except Exception:
+                continue
+        return {
+            "http2_enabled": self.http2,
+            "max_connections": MAX_CONNECTIONS,
+            "max_keepalive_connections": MAX_KEEPALIVE_CONNECTIONS,
+            "hosts": dict(hosts),
+            "requests": dict(self.requests)
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -6,7 +6,7 @@ import Image from 'next/image';
 import Camera from '../components/Camera';
 
 // Helper function to convert base64 to Blob
-const base64ToBlob = (base64) => {
+const base64ToBlob = (base64, mimeType = 'audio/mpeg') => {
     try {
         const base64Data = base64.split(',')[1] || base64;
         const binaryStr = window.atob(base64Data);
@@ -16,13 +16,49 @@ const base64ToBlob = (base64) => {
             bytes[i] = binaryStr.charCodeAt(i);
         }
         
-        return new Blob([bytes], { type: 'audio/mp3' });
+        return new Blob([bytes], { type: mimeType });
     } catch (error) {
         console.error('Error converting base64 to blob:', error);
         return null;
     }
 };
 
+// Spooled sentence audio is fetched by URL (the browser uses range requests); start loading it on arrival.
+// With several backend hosts the URL is absolute and points at the host holding the audio.
+const preloadAudio = (path) => {
+    const audio = new Audio(/^https?:\/\//.test(path) ? path : `${process.env.NEXT_PUBLIC_BACKEND_URL}${path}`);
+    audio.preload = 'auto';
+    return audio;
+};
+
+// Audio formats this browser can decode, most compact first: Opus, then AAC for Safari, then MP3
+const acceptedAudioFormats = () => {
+    const probe = new Audio();
+    const formats = [];
+    if (probe.canPlayType('audio/ogg; codecs=opus')) formats.push('opus');
+    if (probe.canPlayType('audio/aac') || probe.canPlayType('audio/mp4; codecs="mp4a.40.2"')) formats.push('aac');
+    formats.push('mp3');
+    return formats.join(',');
+};
+
+// Ask for a lower bitrate on slow connections; 0 lets the server pick its speech default.
+// The server only applies it when it transcodes, and then echoes the bitrate in its audio_format frame.
+const preferredAudioBitrate = () => {
+    const connection = navigator.connection;
+    if (!connection) return 0;
+    if (connection.saveData) return 16;
+    return { 'slow-2g': 12, '2g': 16, '3g': 24 }[connection.effectiveType] || 0;
+};
+
+// W3C trace context so a turn's /transcribe call and WebSocket answer share one trace
+const newTraceparent = () => {
+    const hex = (length) => Array.from(
+        crypto.getRandomValues(new Uint8Array(length)),
+        (byte) => byte.toString(16).padStart(2, '0')
+    ).join('');
+    return `00-${hex(16)}-${hex(8)}-01`;
+};
+
 // Helper function to clean message text
 const cleanMessage = (text) => {
     // Remove numbered prefixes like "1.", "2.", etc.
@@ -57,6 +93,9 @@ const Interview = () => {
     const [currentSpeaker, setCurrentSpeaker] = useState('interviewer');
     const [showKeyHint, setShowKeyHint] = useState(false);
     const [isCameraEnabled, setIsCameraEnabled] = useState(false);
+    const lastSeqRef = useRef(0);
+    const reconnectAttemptsRef = useRef(0);
+    const reconnectTimerRef = useRef(null);
 
     // Auto-scroll functionality
     const scrollToBottom = useCallback(() => {
@@ -137,13 +176,32 @@ const Interview = () => {
                     break;
 
                 case 'sentence':
+                    // Frames replayed after a reconnect may already have been received
+                    if (data.seq && data.seq <= lastSeqRef.current) {
+                        break;
+                    }
+                    if (data.seq) {
+                        lastSeqRef.current = data.seq;
+                        wsRef.current?.send(JSON.stringify({ type: 'ack', seq: data.seq }));
+                    }
                     setPendingMessages(prev => [...prev, {
                         role: 'interviewer',
                         content: data.text,
-                        audio: data.audio
+                        audio: data.audio,
+                        audioMime: data.audio_mime,
+                        audioElement: data.audio_url ? preloadAudio(data.audio_url) : null
                     }]);
                     break;
 
+                case 'audio_format':
+                    console.log(`Interviewer audio: ${data.format}${data.bitrate ? ` at ${data.bitrate} kbps` : ' as encoded by the provider'}`);
+                    break;
+
+                case 'session_resumed':
+                    reconnectAttemptsRef.current = 0;
+                    setError('');
+                    break;
+
                 default:
                     console.log('Unknown message type:', data.type);
             }
@@ -159,41 +217,7 @@ const Interview = () => {
 
                     if (!wsRef.current || wsRef.current.readyState !== WebSocket.OPEN) {
                         // Always start a new session after document submission
-                        const isNewSession = true;
-                        const wsUrl = `${process.env.NEXT_PUBLIC_WS_URL}/ws/interview?token=${session.backendToken}&user_id=${userId}&new_session=${isNewSession}`;
-                        
-                        const ws = new WebSocket(wsUrl);
-                        wsRef.current = ws;
-
-                        // Keep track of connection state
-                        let isClosing = false;
-
-                        ws.onopen = () => {
-                            setIsConnected(true);
-                            setError('');
-                            isInitializedRef.current = true;
-                        };
-
-                        ws.onmessage = handleWebSocketMessage;
-
-                        ws.onerror = (error) => {
-                            console.error('WebSocket error:', error);
-                            if (!isClosing) {
-                                setError('Connection error occurred');
-                            }
-                        };
-
-                        ws.onclose = (event) => {
-                            isClosing = true;
-                            setIsConnected(false);
-                            console.log('WebSocket closed:', event.code, event.reason);
-                            
-                            // Don't clear messages when switching tabs
-                            if (event.code !== 1000) { // Normal closure
-                                setPendingMessages([]);
-                                setCurrentlyPlaying(null);
-                            }
-                        };
+                        openSocket(userId, true);
                     }
                 } catch (error) {
                     console.error('Interview initialization error:', error);
@@ -202,10 +226,59 @@ const Interview = () => {
             }
         };
 
+        // Resumed sessions pick up where they left off; the server replays frames after lastSeq
+        const openSocket = (userId, isNewSession) => {
+            const wsUrl = `${process.env.NEXT_PUBLIC_WS_URL}/ws/interview?token=${session.backendToken}&user_id=${userId}&new_session=${isNewSession}&last_seq=${lastSeqRef.current}&traceparent=${newTraceparent()}&audio_formats=${acceptedAudioFormats()}&audio_bitrate=${preferredAudioBitrate()}`;
+            
+            const ws = new WebSocket(wsUrl);
+            wsRef.current = ws;
+
+            // Keep track of connection state
+            let isClosing = false;
+
+            ws.onopen = () => {
+                setIsConnected(true);
+                setError('');
+                isInitializedRef.current = true;
+            };
+
+            ws.onmessage = handleWebSocketMessage;
+
+            ws.onerror = (error) => {
+                console.error('WebSocket error:', error);
+                if (!isClosing) {
+                    setError('Connection error occurred');
+                }
+            };
+
+            ws.onclose = (event) => {
+                isClosing = true;
+                setIsConnected(false);
+                console.log('WebSocket closed:', event.code, event.reason);
+
+                // Network blips resume the same session; 4xxx codes are deliberate server closes
+                const shouldResume = event.code !== 1000 && event.code < 4000
+                    && reconnectAttemptsRef.current < 5;
+                if (shouldResume) {
+                    const delay = Math.min(250 * 2 ** reconnectAttemptsRef.current, 4000);
+                    reconnectAttemptsRef.current += 1;
+                    reconnectTimerRef.current = setTimeout(() => openSocket(userId, false), delay);
+                    return;
+                }
+
+                // Don't clear messages when switching tabs
+                if (event.code !== 1000) { // Normal closure
+                    setPendingMessages([]);
+                    setCurrentlyPlaying(null);
+                }
+            };
+        };
+
         initializeInterview();
 
         // Cleanup function
         return () => {
+            clearTimeout(reconnectTimerRef.current);
             if (wsRef.current) {
                 wsRef.current.close(1000, "Normal closure");
             }
@@ -239,9 +312,13 @@ const Interview = () => {
             setCurrentlyPlaying(nextMessage);
 
             try {
-                const audioBlob = base64ToBlob(nextMessage.audio);
-                const audioUrl = URL.createObjectURL(audioBlob);
-                const audio = new Audio(audioUrl);
+                // Inline audio (spool disabled) is played from a blob URL
+                let audioUrl = null;
+                let audio = nextMessage.audioElement;
+                if (!audio) {
+                    audioUrl = URL.createObjectURL(base64ToBlob(nextMessage.audio, nextMessage.audioMime));
+                    audio = new Audio(audioUrl);
+                }
 
                 // Show message when audio starts playing
                 audio.onplay = () => {
@@ -253,7 +330,9 @@ const Interview = () => {
 
                 // Clean up when audio finishes
                 audio.onended = () => {
-                    URL.revokeObjectURL(audioUrl);
+                    if (audioUrl) {
+                        URL.revokeObjectURL(audioUrl);
+                    }
                     setCurrentlyPlaying(null);
                     setPendingMessages(prev => prev.slice(1));
 
@@ -292,12 +371,14 @@ const Interview = () => {
                 try {
                     const formData = new FormData();
                     formData.append('audio', audioBlob);
+                    const traceparent = newTraceparent();
                     
                     const backendURL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000';
                     const response = await fetch(`${backendURL}/transcribe`, {
                         method: 'POST',
                         headers: {
-                            'Authorization': `Bearer ${session.backendToken}`
+                            'Authorization': `Bearer ${session.backendToken}`,
+                            'traceparent': traceparent
                         },
                         body: formData
                     });
@@ -306,7 +387,7 @@ const Interview = () => {
                         const { text } = await response.json();
                         if (wsRef.current?.readyState === WebSocket.OPEN) {
                             setMessages(prev => [...prev, { role: 'user', content: text }]);
-                            wsRef.current.send(text);
+                            wsRef.current.send(JSON.stringify({ type: 'answer', text, traceparent }));
                             setAutoRecordingFailed(false);
                         }
                     } else {
@@ -425,7 +506,7 @@ const Interview = () => {
                         }]);
                         // Clean up interview
                         if (wsRef.current) {
-                            wsRef.current.close();
+                            wsRef.current.close(1000, "Interview time is up");
                         }
                     }
                 }
@@ -84,13 +84,13 @@ const Services = () => {
         }
     };
 
-    const processFile = async (file) => {
+    const processFile = async (file, token) => {
         if (!file) return null;
         const formData = new FormData();
         formData.append('file', file);
-        const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/process-documents`, {
+        const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/upload-documents`, {
             method: 'POST',
-            headers: { 'Authorization': `Bearer ${session.backendToken}` },
+            headers: { 'Authorization': `Bearer ${token}` },
             body: formData
         });
         if (!response.ok) {
@@ -172,8 +172,11 @@ const Services = () => {
             console.log('Submitting documents with token:', !!currentToken);
             
             // Process documents
-            let resumeContent = resumeType === 'text' ? resumeText : await processFile(resumeFile);
-            let jobDescContent = jobDescType === 'text' ? jobDescText : await processFile(jobDescFile);
+            // Both uploads are extracted concurrently
+            let [resumeContent, jobDescContent] = await Promise.all([
+                resumeType === 'text' ? resumeText : processFile(resumeFile, currentToken),
+                jobDescType === 'text' ? jobDescText : processFile(jobDescFile, currentToken)
+            ]);
             
             if (!resumeContent || !jobDescContent) {
                 throw new Error('Both resume and job description are required');